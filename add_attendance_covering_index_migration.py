@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Add covering indexes for per-event analysis queries
+
+event_analysis_single.py filters attendance by event_id and reads only
+person_id, rsvp, checked_in and is_first_event, then joins people for a
+handful of demographic columns. These INCLUDE indexes let PostgreSQL answer
+those reads with index-only scans instead of visiting the heap per row:
+
+- attendance_event_covering: attendance (event_id) INCLUDE (person_id, checked_in, is_first_event, rsvp)
+- people_id_demo: people (id) INCLUDE (gender, school, class_year, event_attendance_count)
+
+Indexes are built CONCURRENTLY (outside a transaction) so the hourly
+pipeline is never blocked on a table lock while they build.
+"""
+
+import psycopg2
+
+from db import PG_CONF
+
+INDEXES = [
+    ('attendance_event_covering', """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS attendance_event_covering
+        ON attendance (event_id)
+        INCLUDE (person_id, checked_in, is_first_event, rsvp);
+    """),
+    ('people_id_demo', """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS people_id_demo
+        ON people (id)
+        INCLUDE (gender, school, class_year, event_attendance_count);
+    """),
+]
+
+
+def connect_to_db():
+    """Connect to Railway PostgreSQL database."""
+    return psycopg2.connect(**PG_CONF)
+
+
+def run_migration():
+    """Create the covering indexes on attendance and people."""
+    conn = connect_to_db()
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    conn.autocommit = True
+    cur = conn.cursor()
+
+    try:
+        print("Starting migration: Adding covering indexes...")
+
+        for index_name, statement in INDEXES:
+            print(f"  - Creating index '{index_name}' (concurrently)...")
+            cur.execute(statement)
+
+        print("✓ Migration completed successfully!")
+
+        # Verify indexes were added and are valid (a failed concurrent build leaves an INVALID index)
+        cur.execute("""
+            SELECT c.relname, i.indisvalid
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = ANY(%s);
+        """, ([name for name, _ in INDEXES],))
+
+        print("\nVerification:")
+        for index_name, is_valid in cur.fetchall():
+            status = "valid" if is_valid else "INVALID - drop and re-run"
+            print(f"  ✓ Index '{index_name}' exists ({status})")
+
+    except psycopg2.Error as e:
+        print(f"✗ Migration failed: {e}")
+        raise
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Add event_metrics_mv materialized view
+
+Before: every event_analysis_single.py run recomputed the attendance and
+demographic counts for the analyzed event *and* its comparison event from the
+raw attendance/people rows, even though past events rarely change.
+
+After: event_metrics_mv stores those counts per event. It is refreshed
+(CONCURRENTLY, so readers are never blocked) at the end of each attendance
+import, and the analysis reads comparison events from it with a single
+primary-key lookup. The event being analyzed is still computed live.
+"""
+
+import psycopg2
+
+from db import PG_CONF
+
+
+def connect_to_db():
+    """Connect to Railway PostgreSQL database."""
+    return psycopg2.connect(**PG_CONF)
+
+
+def run_migration():
+    """Create event_metrics_mv and the unique index needed for concurrent refresh."""
+    conn = connect_to_db()
+    cur = conn.cursor()
+
+    try:
+        print("Creating event_metrics_mv materialized view...")
+        cur.execute("""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS event_metrics_mv AS
+            WITH event_cutoffs AS (
+                -- Underclassmen cutoff year (see LIVE_COUNTS_SQL in event_analysis_single.py)
+                SELECT
+                    id,
+                    CASE
+                        WHEN EXTRACT(MONTH FROM start_datetime) >= 8
+                            THEN EXTRACT(YEAR FROM start_datetime)::int + 2
+                        ELSE EXTRACT(YEAR FROM start_datetime)::int + 1
+                    END AS cutoff_year
+                FROM events
+            )
+            SELECT
+                e.id AS event_id,
+                COUNT(*) FILTER (WHERE a.rsvp) AS rsvps,
+                COUNT(*) FILTER (WHERE a.checked_in) AS attendees,
+                COUNT(*) FILTER (WHERE a.checked_in AND a.is_first_event) AS first_timers,
+                COUNT(*) FILTER (WHERE a.checked_in AND p.gender = 'M') AS male,
+                COUNT(*) FILTER (WHERE a.checked_in AND p.gender = 'F') AS female,
+                COUNT(*) FILTER (WHERE a.checked_in AND p.school = 'mit') AS mit,
+                COUNT(*) FILTER (WHERE a.checked_in AND p.school = 'harvard') AS harvard,
+                COUNT(*) FILTER (WHERE a.checked_in AND p.class_year > e.cutoff_year) AS underclassmen,
+                COUNT(*) FILTER (WHERE a.checked_in AND p.class_year <= e.cutoff_year) AS upperclassmen,
+                COUNT(*) FILTER (WHERE a.checked_in AND p.event_attendance_count = 1) AS first_event,
+                COUNT(*) FILTER (WHERE a.checked_in AND p.event_attendance_count BETWEEN 2 AND 3) AS events_2_3,
+                COUNT(*) FILTER (WHERE a.checked_in AND p.event_attendance_count >= 4) AS events_4_plus
+            FROM event_cutoffs e
+            LEFT JOIN attendance a ON a.event_id = e.id
+            LEFT JOIN people p ON p.id = a.person_id
+            GROUP BY e.id;
+        """)
+
+        # REFRESH ... CONCURRENTLY requires a unique index
+        print("Creating unique index on event_metrics_mv(event_id)...")
+        cur.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS event_metrics_mv_event_id
+            ON event_metrics_mv (event_id);
+        """)
+
+        conn.commit()
+        print("✓ Migration completed successfully!")
+
+        cur.execute("SELECT COUNT(*) FROM event_metrics_mv;")
+        print(f"\nVerification:\n  ✓ event_metrics_mv has {cur.fetchone()[0]} event row(s)")
+
+    except psycopg2.Error as e:
+        print(f"✗ Migration failed: {e}")
+        conn.rollback()
+        raise
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    run_migration()
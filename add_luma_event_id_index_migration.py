@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Index events by Luma event ID
+
+luma_sync.py looks up every event on the Luma calendar by luma_event_id
+(one ANY query per sync). Without an index that is a sequential scan of
+events on every run:
+
+- idx_events_luma_event_id: events (luma_event_id) WHERE luma_event_id IS NOT NULL
+
+The index is partial because events created by hand have no Luma ID, and
+non-unique so it builds even if an old duplicate exists. It is built
+CONCURRENTLY (outside a transaction) so the hourly pipeline is never
+blocked on a table lock while it builds.
+"""
+
+import psycopg2
+
+from db import PG_CONF
+
+INDEX_NAME = 'idx_events_luma_event_id'
+
+
+def connect_to_db():
+    """Connect to Railway PostgreSQL database."""
+    return psycopg2.connect(**PG_CONF)
+
+
+def run_migration():
+    """Create the luma_event_id index on events."""
+    conn = connect_to_db()
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    conn.autocommit = True
+    cur = conn.cursor()
+
+    try:
+        print("Starting migration: Adding luma_event_id index...")
+
+        print(f"  - Creating index '{INDEX_NAME}' (concurrently)...")
+        cur.execute(f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME}
+            ON events (luma_event_id)
+            WHERE luma_event_id IS NOT NULL;
+        """)
+
+        print("✓ Migration completed successfully!")
+
+        # Verify the index was added and is valid (a failed concurrent build leaves an INVALID index)
+        cur.execute("""
+            SELECT i.indisvalid
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = %s;
+        """, (INDEX_NAME,))
+
+        result = cur.fetchone()
+        print("\nVerification:")
+        if result:
+            status = "valid" if result[0] else "INVALID - drop and re-run"
+            print(f"  ✓ Index '{INDEX_NAME}' exists ({status})")
+        else:
+            print(f"  ✗ Index '{INDEX_NAME}' not found")
+
+    except psycopg2.Error as e:
+        print(f"✗ Migration failed: {e}")
+        raise
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    run_migration()
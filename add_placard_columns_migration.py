@@ -8,23 +8,13 @@ This migration adds:
 """
 
 import psycopg2
-import os
-from dotenv import load_dotenv
+
+from db import PG_CONF
 
 
 def connect_to_db():
     """Connect to Railway PostgreSQL database."""
-    load_dotenv()
-
-    conn = psycopg2.connect(
-        host=os.getenv('PGHOST'),
-        port=os.getenv('PGPORT'),
-        database=os.getenv('PGDATABASE'),
-        user=os.getenv('PGUSER'),
-        password=os.getenv('PGPASSWORD')
-    )
-
-    return conn
+    return psycopg2.connect(**PG_CONF)
 
 
 def run_migration():
@@ -35,17 +25,16 @@ def run_migration():
     try:
         print("Starting migration: Adding cost and placard_pdf columns to events table...")
 
-        # Add cost column (NUMERIC for flexible precision)
-        print("  - Adding 'cost' column (NUMERIC)...")
-        cur.execute("""
-            ALTER TABLE events
-            ADD COLUMN IF NOT EXISTS cost NUMERIC;
-        """)
+        # Fail fast instead of queueing behind (and blocking) live traffic
+        cur.execute("SET lock_timeout = '2s';")
 
-        # Add placard_pdf column (BYTEA for binary PDF storage)
-        print("  - Adding 'placard_pdf' column (BYTEA)...")
+        # Add both columns in a single DDL statement (one lock, one catalog update):
+        # - cost (NUMERIC for flexible precision)
+        # - placard_pdf (BYTEA for binary PDF storage)
+        print("  - Adding 'cost' (NUMERIC) and 'placard_pdf' (BYTEA) columns...")
         cur.execute("""
             ALTER TABLE events
+            ADD COLUMN IF NOT EXISTS cost NUMERIC,
             ADD COLUMN IF NOT EXISTS placard_pdf BYTEA;
         """)
 
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Add placard_url column to events table
+
+This migration adds:
+- placard_url (TEXT): Location of the event's placard PDF in object storage,
+  used instead of placard_pdf when generate_all_placards.py runs with --pdf-bucket
+"""
+
+import psycopg2
+
+from db import PG_CONF
+
+
+def connect_to_db():
+    """Connect to Railway PostgreSQL database."""
+    return psycopg2.connect(**PG_CONF)
+
+
+def run_migration():
+    """Add placard_url column to events table."""
+    conn = connect_to_db()
+    cur = conn.cursor()
+
+    try:
+        print("Starting migration: Adding placard_url column to events table...")
+
+        # Fail fast instead of queueing behind (and blocking) live traffic
+        cur.execute("SET lock_timeout = '2s';")
+
+        print("  - Adding 'placard_url' (TEXT) column...")
+        cur.execute("""
+            ALTER TABLE events
+            ADD COLUMN IF NOT EXISTS placard_url TEXT;
+        """)
+
+        # Commit changes
+        conn.commit()
+        print("✓ Migration completed successfully!")
+
+        # Verify column was added
+        cur.execute("""
+            SELECT column_name, data_type
+            FROM information_schema.columns
+            WHERE table_name = 'events'
+            AND column_name = 'placard_url';
+        """)
+
+        columns = cur.fetchall()
+        print("\nVerification:")
+        for col in columns:
+            print(f"  ✓ Column '{col[0]}' exists with type '{col[1]}'")
+
+    except psycopg2.Error as e:
+        print(f"✗ Migration failed: {e}")
+        conn.rollback()
+        raise
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    run_migration()
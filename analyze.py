@@ -23,6 +23,31 @@ from datetime import datetime
 import json
 import io
 
+def read_sql_streaming(query, conn, cursor_name, itersize=2048):
+    """
+    Like pd.read_sql, but fetch rows through a server-side (named) cursor.
+
+    Rows are fetched `itersize` at a time and each batch is turned into a
+    DataFrame before the next is read, so neither libpq nor Python ever holds
+    the whole result as row tuples; only the column arrays of the frames are
+    kept (concatenated once at the end).
+    """
+    chunks = []
+    with conn.cursor(name=cursor_name) as cursor:
+        cursor.execute(query)
+        while True:
+            rows = cursor.fetchmany(itersize)
+            columns = [col[0] for col in cursor.description]
+            if not rows:
+                break
+            chunks.append(pd.DataFrame.from_records(rows, columns=columns, coerce_float=True))
+
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    # A batch that is all NULL in a column comes back as object dtype;
+    # re-infer so the dtypes match a single from_records over every row
+    return pd.concat(chunks, ignore_index=True).infer_objects()
+
 def load_data_from_db():
     """Load data from PostgreSQL database instead of CSV files."""
 
@@ -63,7 +88,7 @@ def load_data_from_db():
             FROM attendance
             ORDER BY rsvp_datetime
         """
-        attendance = pd.read_sql(attendance_query, conn)
+        attendance = read_sql_streaming(attendance_query, conn, 'attendance_cur')
 
         # Load events data
         print("Loading events data...")
@@ -573,18 +598,18 @@ def party_analysis(master, events, outdir):
 def rsvp_conversion_analysis(master, outdir):
     """Analyze RSVP to attendance conversion - both overall and excluding parties."""
 
+    # Compute the masks once; every count below reuses them instead of re-scanning master per person
+    rsvp_mask = master['rsvp'].to_numpy()
+    checked_in_mask = master['checked_in'].to_numpy()
+    non_party_mask = (master['category'] != 'party').to_numpy()
+
     # Version 1: All events
     # Get all people who ever RSVPed
-    rsvp_people = master[master['rsvp']]['person_id'].unique()
+    rsvp_people = master.loc[rsvp_mask, 'person_id'].unique()
 
     # Count how many events each person attended
-    attendance_counts = []
-    for person in rsvp_people:
-        n_attended = master[
-            (master['person_id'] == person) &
-            (master['checked_in'])
-        ]['event_id'].nunique()
-        attendance_counts.append(n_attended)
+    attended_per_person = master[checked_in_mask].groupby('person_id')['event_id'].nunique()
+    attendance_counts = attended_per_person.reindex(rsvp_people, fill_value=0).tolist()
 
     # Create histogram data
     max_count = max(attendance_counts) if attendance_counts else 0
@@ -619,18 +644,11 @@ def rsvp_conversion_analysis(master, outdir):
 
     # Version 2: Excluding party category
     # Get all people who RSVPed to non-party events
-    non_party_rsvps = master[(master['rsvp']) & (master['category'] != 'party')]
-    rsvp_people_no_party = non_party_rsvps['person_id'].unique()
+    rsvp_people_no_party = master.loc[rsvp_mask & non_party_mask, 'person_id'].unique()
 
     # Count how many non-party events each person attended
-    attendance_counts_no_party = []
-    for person in rsvp_people_no_party:
-        n_attended = master[
-            (master['person_id'] == person) &
-            (master['checked_in']) &
-            (master['category'] != 'party')
-        ]['event_id'].nunique()
-        attendance_counts_no_party.append(n_attended)
+    attended_per_person_no_party = master[checked_in_mask & non_party_mask].groupby('person_id')['event_id'].nunique()
+    attendance_counts_no_party = attended_per_person_no_party.reindex(rsvp_people_no_party, fill_value=0).tolist()
 
     # Create histogram data for non-party
     max_count_no_party = max(attendance_counts_no_party) if attendance_counts_no_party else 0
@@ -765,19 +783,25 @@ def save_attendance_to_db(master, events):
 def generate_summary_stats(master, outdir):
     """Generate overall summary statistics."""
 
+    # Filter once and reuse the subsets for every stat below
+    rsvped = master[master['rsvp'].to_numpy()]
+    checked_in = master[master['checked_in'].to_numpy()]
+    n_rsvps = len(rsvped)
+    n_attendances = len(checked_in)
+
     stats = {
         'Total Unique People': master['person_id'].nunique(),
         'Total Events': master['event_id'].nunique(),
-        'Total RSVPs': master[master['rsvp']].shape[0],
-        'Total Attendances': master[master['checked_in']].shape[0],
-        'Unique People Who RSVPed': master[master['rsvp']]['person_id'].nunique(),
-        'Unique People Who Attended': master[master['checked_in']]['person_id'].nunique(),
-        'Overall RSVP→Attendance Rate': master[master['checked_in']].shape[0] / master[master['rsvp']].shape[0] if master[master['rsvp']].shape[0] > 0 else 0,
-        'Avg Events per Attendee': master[master['checked_in']].groupby('person_id')['event_id'].nunique().mean()
+        'Total RSVPs': n_rsvps,
+        'Total Attendances': n_attendances,
+        'Unique People Who RSVPed': rsvped['person_id'].nunique(),
+        'Unique People Who Attended': checked_in['person_id'].nunique(),
+        'Overall RSVP→Attendance Rate': n_attendances / n_rsvps if n_rsvps > 0 else 0,
+        'Avg Events per Attendee': checked_in.groupby('person_id')['event_id'].nunique().mean()
     }
 
     # Demographics of attendees
-    attendees = master[master['checked_in']].drop_duplicates('person_id')
+    attendees = checked_in.drop_duplicates('person_id')
     stats['% Jewish Attendees'] = (attendees['is_jewish'] == 'J').mean() * 100 if 'is_jewish' in attendees.columns else None
     stats['% Female Attendees'] = (attendees['gender'] == 'F').mean() * 100 if 'gender' in attendees.columns else None
 
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Shared PostgreSQL connection pool for the analysis scripts.
+
+A single ThreadedConnectionPool is created the first time a connection is
+requested and reused for the rest of the process, so scripts that run many
+queries across many events only pay the connect/TLS/auth handshake once.
+"""
+
+import os
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+from psycopg2 import pool
+
+# Load environment variables once at import, before PG_CONF reads them
+load_dotenv()
+
+# Snapshot the connection settings
+PG_CONF = {
+    'host': os.getenv('PGHOST'),
+    'port': os.getenv('PGPORT'),
+    'database': os.getenv('PGDATABASE'),
+    'user': os.getenv('PGUSER'),
+    'password': os.getenv('PGPASSWORD'),
+    # TCP keepalives stop long imports from being dropped as idle, and
+    # tcp_user_timeout (ms) bounds how long a write can hang on a dead link
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 5,
+    'tcp_user_timeout': 30000
+}
+
+POOL_MIN_CONN = 1
+POOL_MAX_CONN = 8
+
+_pool = None
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+
+    if _pool is None:
+        _pool = pool.ThreadedConnectionPool(POOL_MIN_CONN, POOL_MAX_CONN, **PG_CONF)
+
+    return _pool
+
+
+@contextmanager
+def get_conn():
+    """
+    Borrow a connection from the pool for the duration of a ``with`` block.
+
+    Any open transaction is rolled back before the connection is handed back,
+    so callers must commit explicitly if they write.
+    """
+    db_pool = get_pool()
+    conn = db_pool.getconn()
+    try:
+        yield conn
+    finally:
+        if not conn.closed:
+            conn.rollback()
+        db_pool.putconn(conn)
+
+
+def close_pool():
+    """Close every pooled connection (call once at process exit)."""
+    global _pool
+
+    if _pool is not None:
+        _pool.closeall()
+        _pool = None
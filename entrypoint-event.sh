@@ -0,0 +1,3 @@
+#!/bin/sh
+# Start the cron service in event mode (see entrypoint.py)
+exec env ENTRY_MODE=event python3 /app/entrypoint.py "$@"
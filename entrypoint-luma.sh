@@ -0,0 +1,3 @@
+#!/bin/sh
+# Start the cron service in luma mode (see entrypoint.py)
+exec env ENTRY_MODE=luma python3 /app/entrypoint.py "$@"
@@ -2,6 +2,11 @@
 """
 Entrypoint script for the cron service.
 Handles startup, environment validation, and keeps container alive.
+
+The same script serves both deployments, selected by ENTRY_MODE (env var or
+first argument; see entrypoint-luma.sh / entrypoint-event.sh):
+- luma (default): full Luma sync & analytics pipeline every 6 hours
+- event: weekly analyze.py run (Sundays at midnight UTC)
 """
 import os
 import sys
@@ -18,10 +23,47 @@ print("=" * 50, flush=True)
 print("ENTRYPOINT STARTING - Python is running!", flush=True)
 print("=" * 50, flush=True)
 
+# Per-mode service settings
+ENTRY_MODES = {
+    'luma': {
+        'title': 'Luma Event Sync & Analytics',
+        'schedule': '0 */6 * * *',
+        'schedule_description': 'Every 6 hours',
+        'command': '/bin/bash /app/run_luma_pipeline.sh',
+        'extra_env_vars': ['LUMA_API_KEY'],
+    },
+    'event': {
+        'title': 'Event Analytics',
+        'schedule': '0 0 * * 0',
+        'schedule_description': 'Sundays at midnight UTC',
+        'command': 'python /app/analyze.py --outdir /app/analysis_outputs',
+        'extra_env_vars': [],
+    },
+}
+
+ENTRY_MODE = sys.argv[1] if len(sys.argv) > 1 else os.getenv('ENTRY_MODE', 'luma')
+if ENTRY_MODE not in ENTRY_MODES:
+    print(f"Unknown ENTRY_MODE '{ENTRY_MODE}' (expected one of: {', '.join(ENTRY_MODES)})", flush=True)
+    sys.exit(1)
+MODE = ENTRY_MODES[ENTRY_MODE]
+
+# Environment variables required at startup, snapshotted once at import
+REQUIRED_ENV_VARS = ['PGHOST', 'PGDATABASE', 'PGUSER', 'PGPASSWORD', 'PGPORT'] + MODE['extra_env_vars']
+SECRET_ENV_VARS = {'PGPASSWORD', 'LUMA_API_KEY'}
+_ENV = {key: os.getenv(key) for key in REQUIRED_ENV_VARS}
+
+# Debian's cron only runs @reboot jobs when this marker does not exist yet
+CRON_REBOOT_MARKER = '/run/crond.reboot'
+
 def log(message):
     """Print with timestamp"""
     print(f"[{datetime.now().isoformat()}] {message}", flush=True)
 
+def log_batch(*messages):
+    """Print several lines back-to-back under a single timestamp (one write)"""
+    timestamp = datetime.now().isoformat()
+    print('\n'.join(f"[{timestamp}] {message}" for message in messages), flush=True)
+
 def generate_crontab():
     """Generate crontab file with environment variables from Railway"""
     log("Generating crontab with environment variables...")
@@ -60,7 +102,11 @@ def generate_crontab():
             crontab_lines.append(f'{var}="{escaped_value}"')
 
     # Add the cron schedule
-    crontab_lines.append('0 */6 * * * cd /app && /bin/bash /app/run_luma_pipeline.sh >> /var/log/cron.log 2>&1')
+    # Run the pipeline once when cron starts (container boot), then on schedule.
+    # Job output goes to PID 1 (cron in the foreground) so it shows up in the container logs
+    job_cmd = f"cd /app && {MODE['command']} > /proc/1/fd/1 2>&1"
+    crontab_lines.append(f'@reboot {job_cmd}')
+    crontab_lines.append(f"{MODE['schedule']} {job_cmd}")
 
     # Write to crontab file
     crontab_content = '\n'.join(crontab_lines) + '\n'
@@ -82,35 +128,29 @@ def generate_crontab():
         return False
 
 def main():
-    log("=" * 50)
-    log("Luma Event Sync & Analytics Cron Service Starting...")
-    log("=" * 50)
-    log(f"Current time: {datetime.now()}")
-    log("Cron schedule: Every 6 hours (0 */6 * * *)")
-    log("")
+    log_batch(
+        "=" * 50,
+        f"{MODE['title']} Cron Service Starting... (mode: {ENTRY_MODE})",
+        "=" * 50,
+        f"Current time: {datetime.now()}",
+        f"Cron schedule: {MODE['schedule_description']} ({MODE['schedule']})",
+        "",
+    )
 
     # Check environment variables
-    log("Environment Variables Check:")
-    env_vars = {
-        'PGHOST': os.getenv('PGHOST'),
-        'PGDATABASE': os.getenv('PGDATABASE'),
-        'PGUSER': os.getenv('PGUSER'),
-        'PGPASSWORD': os.getenv('PGPASSWORD'),
-        'PGPORT': os.getenv('PGPORT'),
-        'LUMA_API_KEY': os.getenv('LUMA_API_KEY'),
-    }
-
+    env_lines = ["Environment Variables Check:"]
     missing = []
-    for key, value in env_vars.items():
-        if key in ['PGPASSWORD', 'LUMA_API_KEY']:
-            log(f"  {key}: {'SET' if value else 'NOT_SET'}")
+    for key, value in _ENV.items():
+        if key in SECRET_ENV_VARS:
+            env_lines.append(f"  {key}: {'SET' if value else 'NOT_SET'}")
         else:
-            log(f"  {key}: {value if value else 'NOT_SET'}")
+            env_lines.append(f"  {key}: {value if value else 'NOT_SET'}")
 
         if not value:
             missing.append(key)
 
-    log("")
+    env_lines.append("")
+    log_batch(*env_lines)
 
     if missing:
         log(f"❌ ERROR: Missing required environment variables: {', '.join(missing)}")
@@ -131,26 +171,6 @@ def main():
 
     log("")
 
-    # Start cron daemon
-    log("Starting cron daemon...")
-    try:
-        subprocess.run(['cron'], check=True)
-        time.sleep(2)  # Give cron time to start
-
-        # Verify cron is running
-        result = subprocess.run(['pgrep', 'cron'], capture_output=True)
-        if result.returncode != 0:
-            raise Exception("Cron process not found")
-
-        log("✅ Cron daemon started successfully")
-    except Exception as e:
-        log(f"❌ ERROR: Failed to start cron daemon: {e}")
-        log("Sleeping for 1 hour to keep container alive for debugging...")
-        time.sleep(3600)
-        sys.exit(1)
-
-    log("")
-
     # Show crontab
     log("Crontab contents:")
     try:
@@ -159,45 +179,37 @@ def main():
     except Exception as e:
         log(f"Could not read crontab: {e}")
 
-    log("")
-
-    # Run initial pipeline
-    log("=" * 50)
-    log("Running Initial Luma Sync & Analytics Pipeline")
-    log("=" * 50)
-
+    log_batch(
+        "",
+        "=" * 50,
+        "Service is Running",
+        "=" * 50,
+        f"Scheduled runs: at startup (@reboot), then {MODE['schedule_description']}",
+        "Volume mount: /app/analysis_outputs",
+        "",
+        "Cron logs will appear below:",
+        "-" * 50,
+    )
+
+    # The reboot marker survives a restart of the same container (railway.toml
+    # restarts on failure), which would make cron skip the @reboot run
     try:
-        result = subprocess.run(
-            ['/bin/bash', '/app/run_luma_pipeline.sh'],
-            capture_output=False,  # Show output in real-time
-            text=True
-        )
-
-        log("")
-        if result.returncode == 0:
-            log("✅ Initial pipeline run completed successfully!")
-        else:
-            log(f"⚠️  Initial pipeline run failed with exit code: {result.returncode}")
-            log("Check the output above for errors.")
-    except Exception as e:
-        log(f"⚠️  Initial pipeline run failed with exception: {e}")
-
-    log("")
-    log("=" * 50)
-    log("Service is Running")
-    log("=" * 50)
-    log("Scheduled runs: Every 6 hours")
-    log("Volume mount: /app/analysis_outputs")
-    log("")
-    log("Cron logs will appear below:")
-    log("-" * 50)
-
-    # Tail the log file to keep container alive
+        os.remove(CRON_REBOOT_MARKER)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        log(f"⚠️  Could not remove {CRON_REBOOT_MARKER}, the startup run may be skipped: {e}")
+
+    # Replace this process with cron in the foreground: cron becomes PID 1,
+    # keeps the container alive, and job output (redirected to PID 1's
+    # stdout in the crontab) goes straight to the container logs.
     try:
-        subprocess.run(['tail', '-f', '/var/log/cron.log'])
-    except KeyboardInterrupt:
-        log("Shutting down...")
-        sys.exit(0)
+        os.execvp('cron', ['cron', '-f', '-L', '15'])
+    except OSError as e:
+        log(f"❌ ERROR: Failed to start cron daemon: {e}")
+        log("Sleeping for 1 hour to keep container alive for debugging...")
+        time.sleep(3600)
+        sys.exit(1)
 
 if __name__ == '__main__':
     try:
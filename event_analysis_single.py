@@ -10,51 +10,178 @@ Outputs a CSV with comprehensive metrics including:
 - Retention rates from previous 4 events
 """
 
-import psycopg2
-import pandas as pd
-import os
-from dotenv import load_dotenv
+import csv
+import fcntl
+import weakref
 from datetime import datetime
 from pathlib import Path
 
 
-def connect_to_db():
-    """Connect to Railway PostgreSQL database."""
-    load_dotenv()
+# Attendance counts per event, aggregated server-side. The underclassmen
+# cutoff is the closest year that has had August, + 2 (freshmen + sophomores):
+# event year + 2 from August onwards, otherwise event year + 1.
+LIVE_COUNTS_SQL = """
+    SELECT
+        a.event_id,
+        COUNT(*) FILTER (WHERE a.rsvp) AS rsvps,
+        COUNT(*) FILTER (WHERE a.checked_in) AS attendees,
+        COUNT(*) FILTER (WHERE a.checked_in AND a.is_first_event) AS first_timers,
+        COUNT(*) FILTER (WHERE a.checked_in AND p.gender = 'M') AS male,
+        COUNT(*) FILTER (WHERE a.checked_in AND p.gender = 'F') AS female,
+        COUNT(*) FILTER (WHERE a.checked_in AND p.school = 'mit') AS mit,
+        COUNT(*) FILTER (WHERE a.checked_in AND p.school = 'harvard') AS harvard,
+        COUNT(*) FILTER (WHERE a.checked_in AND p.class_year > c.cutoff_year) AS underclassmen,
+        COUNT(*) FILTER (WHERE a.checked_in AND p.class_year <= c.cutoff_year) AS upperclassmen,
+        COUNT(*) FILTER (WHERE a.checked_in AND p.event_attendance_count = 1) AS first_event,
+        COUNT(*) FILTER (WHERE a.checked_in AND p.event_attendance_count BETWEEN 2 AND 3) AS events_2_3,
+        COUNT(*) FILTER (WHERE a.checked_in AND p.event_attendance_count >= 4) AS events_4_plus
+    FROM attendance a
+    JOIN people p ON a.person_id = p.id
+    JOIN (
+        SELECT
+            id,
+            CASE
+                WHEN EXTRACT(MONTH FROM start_datetime) >= 8
+                    THEN EXTRACT(YEAR FROM start_datetime)::int + 2
+                ELSE EXTRACT(YEAR FROM start_datetime)::int + 1
+            END AS cutoff_year
+        FROM events
+        WHERE id = ANY($1)
+    ) c ON c.id = a.event_id
+    WHERE a.event_id = ANY($1)
+    GROUP BY a.event_id
+"""
 
-    conn = psycopg2.connect(
-        host=os.getenv('PGHOST'),
-        port=os.getenv('PGPORT'),
-        database=os.getenv('PGDATABASE'),
-        user=os.getenv('PGUSER'),
-        password=os.getenv('PGPASSWORD')
-    )
+# Cached counts (event_metrics_mv, see add_event_metrics_view_migration.py)
+CACHED_COUNTS_SQL = """
+    SELECT event_id, rsvps, attendees, first_timers, male, female, mit, harvard,
+           underclassmen, upperclassmen, first_event, events_2_3, events_4_plus
+    FROM event_metrics_mv
+    WHERE event_id = ANY($2)
+"""
+
+# Event details plus counts for a batch of events in one round trip.
+# Params: (live event_ids, cached event_ids)
+EVENT_METRICS_SQL = """
+    PREPARE p_event_metrics (integer[], integer[]) AS
+    WITH counts AS ({counts})
+    SELECT
+        e.id, e.event_name, e.start_datetime, e.category, e.cost, COALESCE(e.location, '') AS location,
+        c.event_id IS NOT NULL AS has_counts,
+        COALESCE(c.rsvps, 0), COALESCE(c.attendees, 0), COALESCE(c.first_timers, 0),
+        COALESCE(c.male, 0), COALESCE(c.female, 0), COALESCE(c.mit, 0), COALESCE(c.harvard, 0),
+        COALESCE(c.underclassmen, 0), COALESCE(c.upperclassmen, 0), COALESCE(c.first_event, 0),
+        COALESCE(c.events_2_3, 0), COALESCE(c.events_4_plus, 0)
+    FROM events e
+    LEFT JOIN counts c ON c.event_id = e.id
+    WHERE e.id = ANY($1) OR e.id = ANY($2)
+"""
+
+# Per-event lookups are prepared once per database session (see prepare_statements)
+PREPARED_STATEMENTS = {
+    # Retention of previous events' checked-in attendees into the current event.
+    # The a_cur probe is served by the UNIQUE (person_id, event_id) index.
+    # Params: (current event_id, list of previous event_ids)
+    'p_retention_counts': """
+        PREPARE p_retention_counts (integer, integer[]) AS
+        SELECT
+            a_prev.event_id,
+            COUNT(*) AS prev_total,
+            COUNT(a_cur.person_id) AS returned,
+            COUNT(*) FILTER (WHERE a_prev.is_first_event) AS prev_first_timers,
+            COUNT(a_cur.person_id) FILTER (WHERE a_prev.is_first_event) AS first_timers_returned
+        FROM attendance a_prev
+        LEFT JOIN attendance a_cur
+            ON a_cur.person_id = a_prev.person_id
+            AND a_cur.event_id = $1
+            AND a_cur.checked_in = TRUE
+        WHERE a_prev.event_id = ANY($2) AND a_prev.checked_in = TRUE
+        GROUP BY a_prev.event_id
+    """,
+}
+
+EVENT_INFO_COLUMNS = ('id', 'event_name', 'start_datetime', 'category', 'cost', 'location', 'has_counts')
+
+ATTENDANCE_COUNT_COLUMNS = (
+    'rsvps', 'attendees', 'first_timers', 'male', 'female', 'mit', 'harvard',
+    'underclassmen', 'upperclassmen', 'first_event', 'events_2_3', 'events_4_plus',
+)
+
+# Connections that already have PREPARED_STATEMENTS in their session,
+# mapped to whether event_metrics_mv is available on them
+_prepared_connections = weakref.WeakKeyDictionary()
+
+
+def prepare_statements(conn, cursor):
+    """
+    PREPARE the per-event lookup statements once per database session.
+
+    Prepared statements outlive transactions, so a pooled connection only
+    pays the parse/plan cost the first time it is used here.
+
+    Returns:
+        True if event_metrics_mv exists (so p_event_metrics can read from it)
+    """
+    if conn in _prepared_connections:
+        return _prepared_connections[conn]
+
+    for statement in PREPARED_STATEMENTS.values():
+        cursor.execute(statement)
+
+    cursor.execute("SELECT to_regclass('event_metrics_mv') IS NOT NULL")
+    has_metrics_view = cursor.fetchone()[0]
+    if has_metrics_view:
+        counts_sql = LIVE_COUNTS_SQL + " UNION ALL " + CACHED_COUNTS_SQL
+    else:
+        counts_sql = LIVE_COUNTS_SQL
+    cursor.execute(EVENT_METRICS_SQL.format(counts=counts_sql))
 
-    return conn
+    _prepared_connections[conn] = has_metrics_view
+    return has_metrics_view
 
 
-def display_events(conn):
-    """Display all events and let user choose one."""
+def display_events(conn, limit=50):
+    """
+    Display recent events so the user can choose one.
+
+    Args:
+        conn: Database connection
+        limit: Maximum number of events to show (None shows every event)
+
+    Returns:
+        Set of the event IDs that were displayed
+    """
     query = """
-    SELECT id, event_name, start_datetime, category, attendance
+    SELECT id, event_name, start_datetime, COALESCE(category, 'N/A') AS category, COALESCE(attendance, 0) AS attendance
     FROM events
     ORDER BY start_datetime DESC
     """
-
-    events_df = pd.read_sql(query, conn)
+    params = None
+    if limit is not None:
+        query += "LIMIT %s"
+        params = (limit,)
 
     print("\n=== AVAILABLE EVENTS ===")
     print(f"{'ID':<5} {'Name':<50} {'Date':<20} {'Category':<15} {'Attendance':<10}")
     print("=" * 105)
 
-    for _, row in events_df.iterrows():
-        date_str = row['start_datetime'].strftime('%Y-%m-%d %H:%M') if pd.notna(row['start_datetime']) else 'N/A'
-        attendance = row['attendance'] if pd.notna(row['attendance']) else 0
-        category = row['category'] if pd.notna(row['category']) else 'N/A'
-        print(f"{row['id']:<5} {row['event_name'][:48]:<50} {date_str:<20} {category:<15} {int(attendance):<10}")
+    displayed_ids = set()
+    with conn.cursor() as cursor:
+        cursor.execute(query, params)
+        for event_id, event_name, start_datetime, category, attendance in cursor:
+            date_str = start_datetime.strftime('%Y-%m-%d %H:%M') if start_datetime is not None else 'N/A'
+            print(f"{event_id:<5} {event_name[:48]:<50} {date_str:<20} {category:<15} {int(attendance):<10}")
+            displayed_ids.add(event_id)
 
     print("\n")
-    return events_df
+    return displayed_ids
+
+
+def event_exists(conn, event_id):
+    """Return True if an event with this ID exists."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM events WHERE id = %s", (event_id,))
+        return cursor.fetchone() is not None
 
 
 def display_past_events(conn, limit=15):
@@ -62,27 +189,27 @@ def display_past_events(conn, limit=15):
     Display past events for selection.
     Returns a list of events ordered by datetime (most recent first).
     """
+    from psycopg2.extras import RealDictCursor
+
     query = """
-    SELECT id, event_name, start_datetime, category, attendance
+    SELECT id, event_name, start_datetime, COALESCE(category, 'N/A') AS category, COALESCE(attendance, 0) AS attendance
     FROM events
     ORDER BY start_datetime DESC
     LIMIT %s
     """
 
-    events_df = pd.read_sql(query, conn, params=(limit,))
+    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute(query, (limit,))
+        events_list = cursor.fetchall()
 
     print("\n=== SELECT PAST EVENTS TO ANALYZE ===")
     print("(Select up to 4 events by entering event IDs separated by commas, e.g., 42,41,38)\n")
     print(f"{'ID':<5} {'Name':<50} {'Date':<20} {'Category':<15} {'Attendance':<10}")
     print("=" * 105)
 
-    events_list = []
-    for _, row in events_df.iterrows():
-        date_str = row['start_datetime'].strftime('%Y-%m-%d %H:%M') if pd.notna(row['start_datetime']) else 'N/A'
-        attendance = row['attendance'] if pd.notna(row['attendance']) else 0
-        category = row['category'] if pd.notna(row['category']) else 'N/A'
-        print(f"{row['id']:<5} {row['event_name'][:48]:<50} {date_str:<20} {category:<15} {int(attendance):<10}")
-        events_list.append(row)
+    for row in events_list:
+        date_str = row['start_datetime'].strftime('%Y-%m-%d %H:%M') if row['start_datetime'] is not None else 'N/A'
+        print(f"{row['id']:<5} {row['event_name'][:48]:<50} {date_str:<20} {row['category']:<15} {int(row['attendance']):<10}")
 
     print("\n")
     return events_list
@@ -94,7 +221,7 @@ def get_user_event_selection(events_list):
     Returns a list of selected event IDs.
     """
     max_selections = 4
-    available_event_ids = [row['id'] for row in events_list]
+    available_event_ids = {row['id'] for row in events_list}
 
     while True:
         try:
@@ -138,68 +265,96 @@ def get_user_event_selection(events_list):
             return None
 
 
-def calculate_academic_year_cutoff(event_date):
+def get_event_metrics_batch(conn, event_ids, cached_event_ids=()):
     """
-    Calculate the class year cutoff for underclassmen.
-    Underclassmen = freshmen + sophomores
+    Get comprehensive metrics for several events with a single query.
 
-    The cutoff is: closest year that has had August + 2
-    - If we're past August, it's current_year + 2
-    - If we haven't reached August yet, it's (current_year - 1) + 2
+    Args:
+        conn: Database connection
+        event_ids: IDs of the events to compute live
+        cached_event_ids: IDs of events whose attendance counts may be read
+            from event_metrics_mv (as of its last refresh) when available.
+            Use this for comparison events; the event being analyzed should
+            stay live.
+
+    Returns:
+        Dict mapping event_id -> metrics dict (missing events are omitted)
     """
-    if event_date.month >= 8:  # August or later
-        return event_date.year + 2
-    else:  # Before August
-        return (event_date.year - 1) + 2
+    live_ids = list(dict.fromkeys(event_ids))
+    cached_ids = [eid for eid in dict.fromkeys(cached_event_ids) if eid not in live_ids]
+
+    cursor = conn.cursor()
+    try:
+        has_metrics_view = prepare_statements(conn, cursor)
+        if not has_metrics_view:
+            live_ids, cached_ids = live_ids + cached_ids, []
+
+        cursor.execute("EXECUTE p_event_metrics (%s, %s)", (live_ids, cached_ids))
+        rows = cursor.fetchall()
+
+        # Cached events the view has not picked up yet are recomputed live
+        has_counts = EVENT_INFO_COLUMNS.index('has_counts')
+        stale_ids = [row[0] for row in rows if row[0] in cached_ids and not row[has_counts]]
+        if stale_ids:
+            rows = [row for row in rows if row[0] not in stale_ids]
+            cursor.execute("EXECUTE p_event_metrics (%s, %s)", (stale_ids, []))
+            rows.extend(cursor.fetchall())
+    finally:
+        cursor.close()
 
+    info_width = len(EVENT_INFO_COLUMNS)
+    metrics_by_event = {}
+    for row in rows:
+        event_info = dict(zip(EVENT_INFO_COLUMNS, row[:info_width]))
+        counts = dict(zip(ATTENDANCE_COUNT_COLUMNS, row[info_width:]))
 
-def get_event_metrics(conn, event_id):
-    """Get comprehensive metrics for a specific event."""
+        metrics = {
+            'event_id': event_info['id'],
+            'event_name': event_info['event_name'],
+            'event_date': event_info['start_datetime'],
+            'category': event_info['category'],
+            # events.cost is NUMERIC, which psycopg2 returns as Decimal; keep
+            # it (and the per-attendee costs) plain floats in the CSV
+            'cost': float(event_info['cost']) if event_info['cost'] is not None else None,
+            'location': event_info['location']
+        }
 
-    # Get event details
-    event_query = """
-    SELECT id, event_name, start_datetime, category, cost, location
-    FROM events
-    WHERE id = %s
+        add_count_metrics(metrics, counts)
+        metrics_by_event[event_info['id']] = metrics
+
+    return metrics_by_event
+
+
+def get_event_metrics(conn, event_id, use_cache=False):
     """
-    event_info = pd.read_sql(event_query, conn, params=(event_id,))
+    Get comprehensive metrics for a specific event.
 
-    if event_info.empty:
-        return None
+    Args:
+        conn: Database connection
+        event_id: ID of the event
+        use_cache: Read attendance counts from event_metrics_mv when available
+            (see get_event_metrics_batch)
+    """
+    if use_cache:
+        metrics_by_event = get_event_metrics_batch(conn, [], cached_event_ids=[event_id])
+    else:
+        metrics_by_event = get_event_metrics_batch(conn, [event_id])
 
-    event_info = event_info.iloc[0]
-    event_date = event_info['start_datetime']
+    return metrics_by_event.get(event_id)
 
-    # Get attendance data with people info
-    attendance_query = """
-    SELECT
-        a.person_id,
-        a.rsvp,
-        a.checked_in,
-        a.is_first_event,
-        p.gender,
-        p.school,
-        p.class_year,
-        p.event_attendance_count
-    FROM attendance a
-    JOIN people p ON a.person_id = p.id
-    WHERE a.event_id = %s
+
+def add_count_metrics(metrics, counts):
     """
-    attendance_df = pd.read_sql(attendance_query, conn, params=(event_id,))
-
-    metrics = {
-        'event_id': event_id,
-        'event_name': event_info['event_name'],
-        'event_date': event_date,
-        'category': event_info['category'],
-        'cost': event_info['cost'] if pd.notna(event_info['cost']) else None,
-        'location': event_info['location'] if pd.notna(event_info['location']) else ''
-    }
+    Fill in core, financial and demographic metrics from aggregated counts.
 
+    Args:
+        metrics: Metrics dict for the event (must already contain 'cost')
+        counts: Dict keyed by ATTENDANCE_COUNT_COLUMNS
+    """
     # Core metrics
-    metrics['rsvps'] = attendance_df['rsvp'].sum()
-    metrics['attendees'] = attendance_df['checked_in'].sum()
-    metrics['first_timers'] = attendance_df[attendance_df['checked_in'] & attendance_df['is_first_event']].shape[0]
+    metrics['rsvps'] = counts['rsvps']
+    metrics['attendees'] = counts['attendees']
+    metrics['first_timers'] = counts['first_timers']
 
     # Financial metrics (if cost is available)
     if metrics['cost'] is not None:
@@ -209,15 +364,12 @@ def get_event_metrics(conn, event_id):
         metrics['per_attendee_cost'] = None
         metrics['per_first_timer_cost'] = None
 
-    # Get only attendees for demographic analysis
-    attendees = attendance_df[attendance_df['checked_in']]
+    total_attendees = counts['attendees']
 
-    if len(attendees) > 0:
+    if total_attendees > 0:
         # Gender breakdown
-        gender_counts = attendees['gender'].value_counts()
-        total_attendees = len(attendees)
-        raw_male_pct = (gender_counts.get('M', 0) / total_attendees * 100) if total_attendees > 0 else 0
-        raw_female_pct = (gender_counts.get('F', 0) / total_attendees * 100) if total_attendees > 0 else 0
+        raw_male_pct = counts['male'] / total_attendees * 100
+        raw_female_pct = counts['female'] / total_attendees * 100
 
         # Calculate unaccounted gender percentage
         gender_sum = raw_male_pct + raw_female_pct
@@ -232,9 +384,8 @@ def get_event_metrics(conn, event_id):
             metrics['female_pct'] = 0
 
         # School breakdown
-        school_counts = attendees['school'].value_counts()
-        raw_mit_pct = (school_counts.get('mit', 0) / total_attendees * 100) if total_attendees > 0 else 0
-        raw_harvard_pct = (school_counts.get('harvard', 0) / total_attendees * 100) if total_attendees > 0 else 0
+        raw_mit_pct = counts['mit'] / total_attendees * 100
+        raw_harvard_pct = counts['harvard'] / total_attendees * 100
 
         # Calculate unaccounted school percentage
         school_sum = raw_mit_pct + raw_harvard_pct
@@ -248,16 +399,9 @@ def get_event_metrics(conn, event_id):
             metrics['mit_pct'] = 0
             metrics['harvard_pct'] = 0
 
-        # Class year breakdown (underclassmen vs upperclassmen)
-        cutoff_year = calculate_academic_year_cutoff(event_date)
-        # Filter out NULL/NaN class_year values
-        attendees_with_class_year = attendees[attendees['class_year'].notna()]
-        underclassmen = attendees_with_class_year[attendees_with_class_year['class_year'] > cutoff_year].shape[0]
-        upperclassmen = attendees_with_class_year[attendees_with_class_year['class_year'] <= cutoff_year].shape[0]
-
-        # Calculate raw percentages
-        raw_underclassmen_pct = (underclassmen / total_attendees * 100) if total_attendees > 0 else 0
-        raw_upperclassmen_pct = (upperclassmen / total_attendees * 100) if total_attendees > 0 else 0
+        # Class year breakdown (underclassmen vs upperclassmen; NULL class_year is unaccounted)
+        raw_underclassmen_pct = counts['underclassmen'] / total_attendees * 100
+        raw_upperclassmen_pct = counts['upperclassmen'] / total_attendees * 100
 
         # Calculate unaccounted class year percentage
         class_year_sum = raw_underclassmen_pct + raw_upperclassmen_pct
@@ -272,13 +416,9 @@ def get_event_metrics(conn, event_id):
             metrics['upperclassmen_pct'] = 0
 
         # Attendance frequency breakdown (using lifetime event_attendance_count)
-        first_event = attendees[attendees['event_attendance_count'] == 1].shape[0]
-        events_2_3 = attendees[(attendees['event_attendance_count'] >= 2) & (attendees['event_attendance_count'] <= 3)].shape[0]
-        events_4_plus = attendees[attendees['event_attendance_count'] >= 4].shape[0]
-
-        metrics['first_event_pct'] = (first_event / total_attendees * 100) if total_attendees > 0 else 0
-        metrics['events_2_3_pct'] = (events_2_3 / total_attendees * 100) if total_attendees > 0 else 0
-        metrics['events_4_plus_pct'] = (events_4_plus / total_attendees * 100) if total_attendees > 0 else 0
+        metrics['first_event_pct'] = counts['first_event'] / total_attendees * 100
+        metrics['events_2_3_pct'] = counts['events_2_3'] / total_attendees * 100
+        metrics['events_4_plus_pct'] = counts['events_4_plus'] / total_attendees * 100
     else:
         # No attendees
         metrics['male_pct'] = 0
@@ -294,8 +434,6 @@ def get_event_metrics(conn, event_id):
         metrics['events_2_3_pct'] = 0
         metrics['events_4_plus_pct'] = 0
 
-    return metrics
-
 
 def get_previous_events_by_datetime(conn, current_event_id, limit=4, min_attendance=10):
     """
@@ -348,28 +486,35 @@ def get_previous_events_by_datetime(conn, current_event_id, limit=4, min_attenda
         cursor.close()
 
 
-def calculate_retention_rates(conn, current_event_id):
+def compute_retention(conn, current_event_id, previous_events):
     """
-    Calculate retention rates from previous 4 events.
+    Calculate retention of previous events' attendees into the current event.
 
-    For each of events i-1, i-2, i-3, i-4:
-    - % of attendees who also attended event i
-    - % of first timers who also attended event i
-    - Event name and date
-    """
-    retention = {}
+    The overlap between each previous event's attendees and the current
+    event's attendees is counted in the database with a single self-join, so
+    no attendee IDs are transferred.
 
-    # Get current event attendees
-    current_attendees_query = """
-    SELECT person_id
-    FROM attendance
-    WHERE event_id = %s AND checked_in = TRUE
+    Args:
+        conn: Database connection
+        current_event_id: ID of the event being analyzed
+        previous_events: List of (event_id, event_name, start_datetime) tuples,
+            most recent first (at most 4 are used, as i-1 .. i-4)
+
+    Returns:
+        Dict of retention fields keyed by offset
     """
-    current_attendees = pd.read_sql(current_attendees_query, conn, params=(current_event_id,))
-    current_attendee_ids = set(current_attendees['person_id'].tolist())
+    retention = {}
+    previous_events = previous_events[:4]
 
-    # Get previous events by datetime (chronologically ordered)
-    previous_events = get_previous_events_by_datetime(conn, current_event_id, limit=4)
+    # Count (returning) attendees and first timers for every previous event at once
+    prev_event_ids = [event[0] for event in previous_events]
+    cursor = conn.cursor()
+    try:
+        prepare_statements(conn, cursor)
+        cursor.execute("EXECUTE p_retention_counts (%s, %s)", (current_event_id, prev_event_ids))
+        counts_by_event = {row[0]: row[1:] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
 
     # Process each previous event (i-1, i-2, i-3, i-4)
     for offset in range(1, 5):
@@ -384,42 +529,44 @@ def calculate_retention_rates(conn, current_event_id):
             retention[f'event_date_i_minus_{offset}'] = None
             continue
 
-        # Get event info from the datetime-ordered list
         prev_event_id, prev_event_name, prev_event_datetime = previous_events[idx]
 
         # Store event name and date
         retention[f'event_name_i_minus_{offset}'] = truncate_event_name(prev_event_name)
         retention[f'event_date_i_minus_{offset}'] = prev_event_datetime
 
-        # Get previous event attendees
-        prev_attendees_query = """
-        SELECT person_id, is_first_event
-        FROM attendance
-        WHERE event_id = %s AND checked_in = TRUE
-        """
-        prev_attendees = pd.read_sql(prev_attendees_query, conn, params=(prev_event_id,))
-
-        if prev_attendees.empty:
+        if prev_event_id not in counts_by_event:
+            # No checked-in attendees at the previous event
             retention[f'return_rate_i_minus_{offset}'] = None
             retention[f'first_timer_return_rate_i_minus_{offset}'] = None
             continue
 
+        total_prev, returned, total_first_timers, first_timers_returned = counts_by_event[prev_event_id]
+
         # Calculate return rate for all attendees
-        prev_attendee_ids = set(prev_attendees['person_id'].tolist())
-        returned = len(current_attendee_ids & prev_attendee_ids)
-        total_prev = len(prev_attendee_ids)
         retention[f'return_rate_i_minus_{offset}'] = (returned / total_prev * 100) if total_prev > 0 else 0
 
         # Calculate return rate for first timers only
-        first_timers = prev_attendees[prev_attendees['is_first_event'] == True]
-        first_timer_ids = set(first_timers['person_id'].tolist())
-        first_timers_returned = len(current_attendee_ids & first_timer_ids)
-        total_first_timers = len(first_timer_ids)
         retention[f'first_timer_return_rate_i_minus_{offset}'] = (first_timers_returned / total_first_timers * 100) if total_first_timers > 0 else 0
 
     return retention
 
 
+def calculate_retention_rates(conn, current_event_id):
+    """
+    Calculate retention rates from previous 4 events.
+
+    For each of events i-1, i-2, i-3, i-4:
+    - % of attendees who also attended event i
+    - % of first timers who also attended event i
+    - Event name and date
+    """
+    # Get previous events by datetime (chronologically ordered)
+    previous_events = get_previous_events_by_datetime(conn, current_event_id, limit=4)
+
+    return compute_retention(conn, current_event_id, previous_events)
+
+
 def calculate_retention_rates_manual(conn, current_event_id, selected_event_ids):
     """
     Calculate retention rates from manually selected events.
@@ -434,77 +581,19 @@ def calculate_retention_rates_manual(conn, current_event_id, selected_event_ids)
     - % of first timers who also attended current event
     - Event name and date
     """
-    retention = {}
-
-    # Get current event attendees
-    current_attendees_query = """
-    SELECT person_id
-    FROM attendance
-    WHERE event_id = %s AND checked_in = TRUE
-    """
-    current_attendees = pd.read_sql(current_attendees_query, conn, params=(current_event_id,))
-    current_attendee_ids = set(current_attendees['person_id'].tolist())
-
     # Get event info for selected events and sort by datetime
     cursor = conn.cursor()
-    placeholders = ','.join(['%s'] * len(selected_event_ids))
-    cursor.execute(f"""
+    cursor.execute("""
         SELECT id, event_name, start_datetime
         FROM events
-        WHERE id IN ({placeholders})
+        WHERE id = ANY(%s)
         ORDER BY start_datetime DESC
-    """, tuple(selected_event_ids))
+    """, (list(selected_event_ids),))
 
     sorted_events = cursor.fetchall()
     cursor.close()
 
-    # Process each selected event (i-1, i-2, i-3, i-4)
-    for offset in range(1, 5):
-        idx = offset - 1  # Convert to 0-based index
-
-        # Check if we have an event at this offset
-        if idx >= len(sorted_events):
-            # No more events
-            retention[f'return_rate_i_minus_{offset}'] = None
-            retention[f'first_timer_return_rate_i_minus_{offset}'] = None
-            retention[f'event_name_i_minus_{offset}'] = None
-            retention[f'event_date_i_minus_{offset}'] = None
-            continue
-
-        # Get event info from the sorted list
-        prev_event_id, prev_event_name, prev_event_datetime = sorted_events[idx]
-
-        # Store event name and date
-        retention[f'event_name_i_minus_{offset}'] = truncate_event_name(prev_event_name)
-        retention[f'event_date_i_minus_{offset}'] = prev_event_datetime
-
-        # Get previous event attendees
-        prev_attendees_query = """
-        SELECT person_id, is_first_event
-        FROM attendance
-        WHERE event_id = %s AND checked_in = TRUE
-        """
-        prev_attendees = pd.read_sql(prev_attendees_query, conn, params=(prev_event_id,))
-
-        if prev_attendees.empty:
-            retention[f'return_rate_i_minus_{offset}'] = None
-            retention[f'first_timer_return_rate_i_minus_{offset}'] = None
-            continue
-
-        # Calculate return rate for all attendees
-        prev_attendee_ids = set(prev_attendees['person_id'].tolist())
-        returned = len(current_attendee_ids & prev_attendee_ids)
-        total_prev = len(prev_attendee_ids)
-        retention[f'return_rate_i_minus_{offset}'] = (returned / total_prev * 100) if total_prev > 0 else 0
-
-        # Calculate return rate for first timers only
-        first_timers = prev_attendees[prev_attendees['is_first_event'] == True]
-        first_timer_ids = set(first_timers['person_id'].tolist())
-        first_timers_returned = len(current_attendee_ids & first_timer_ids)
-        total_first_timers = len(first_timer_ids)
-        retention[f'first_timer_return_rate_i_minus_{offset}'] = (first_timers_returned / total_first_timers * 100) if total_first_timers > 0 else 0
-
-    return retention
+    return compute_retention(conn, current_event_id, sorted_events)
 
 
 def truncate_event_name(event_name, max_words=3):
@@ -528,6 +617,31 @@ def truncate_event_name(event_name, max_words=3):
     return ' '.join(words[:max_words])
 
 
+def append_output_row(output_path, row):
+    """
+    Append one analysis row to the output CSV under an exclusive file lock.
+
+    The header is written only when the file is new/empty, checked while the
+    lock is held, so concurrent analyses cannot interleave rows or headers.
+
+    Returns:
+        True if the file already had content (row appended), False if created
+    """
+    with open(output_path, 'a', newline='', buffering=1 << 16) as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            file_exists = f.tell() > 0
+            writer = csv.DictWriter(f, fieldnames=list(row.keys()))
+            if not file_exists:
+                writer.writeheader()
+            writer.writerow(row)
+            f.flush()
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+    return file_exists
+
+
 def calculate_percent_change(current, previous):
     """Calculate percentage change between two values."""
     if previous is None or previous == 0:
@@ -543,6 +657,7 @@ def main():
     parser = argparse.ArgumentParser(description='Single Event Analysis')
     parser.add_argument('--event-id', type=int, help='Event ID to analyze (for automated mode)')
     parser.add_argument('--choose-past', action='store_true', help='Interactively select 4 past events for retention calculation (requires --event-id)')
+    parser.add_argument('--show-all', action='store_true', help='In interactive mode, list every event instead of the 50 most recent')
     parser.add_argument('--outdir', type=str, default='.', help='Output directory for CSV file')
     parser.add_argument('--output-file', type=str, default='event_analysis_all.csv', help='Output CSV filename (default: event_analysis_all.csv)')
     args = parser.parse_args()
@@ -551,13 +666,20 @@ def main():
     if args.choose_past and not args.event_id:
         parser.error("--choose-past requires --event-id to specify which event to analyze")
 
+    # Heavy imports (psycopg2, dotenv) are deferred until arguments are valid
+    from db import get_conn
+
     print("=== Single Event Analysis ===\n")
 
-    # Connect to database
+    # Borrow a pooled database connection
     print("Connecting to Railway database...")
-    conn = connect_to_db()
-    print("Connected!\n")
+    with get_conn() as conn:
+        print("Connected!\n")
+        run_analysis(conn, args)
+
 
+def run_analysis(conn, args):
+    """Run the analysis for the event selected via args (or interactively)."""
     # Get event ID and optionally manual retention events
     selected_retention_event_ids = None
 
@@ -568,7 +690,6 @@ def main():
 
         if selected_retention_event_ids is None:
             print("No events selected. Exiting.")
-            conn.close()
             return
 
         print(f"\nSelected {len(selected_retention_event_ids)} event(s) for retention calculation.")
@@ -583,13 +704,14 @@ def main():
     else:
         # Interactive mode - single event
         # Display events
-        events_df = display_events(conn)
+        displayed_ids = display_events(conn, limit=None if args.show_all else 50)
 
         # Get event ID from user
         while True:
             try:
                 event_id = int(input("Enter event ID to analyze: "))
-                if event_id in events_df['id'].values:
+                # Only hit the database for IDs that weren't in the displayed list
+                if event_id in displayed_ids or event_exists(conn, event_id):
                     break
                 else:
                     print(f"Error: Event ID {event_id} not found. Please try again.")
@@ -603,24 +725,26 @@ def main():
     outdir.mkdir(parents=True, exist_ok=True)
     output_path = outdir / args.output_file
 
-    # Get metrics for current event
-    current_metrics = get_event_metrics(conn, event_id)
-
-    if current_metrics is None:
-        print(f"Error: Could not find event {event_id}")
-        conn.close()
-        return
-
-    # Get metrics for previous event
+    # Pick the previous event to compare against
     if selected_retention_event_ids is not None:
         # Use first selected event as previous event for comparison
         prev_event_id = selected_retention_event_ids[0]
-        prev_metrics = get_event_metrics(conn, prev_event_id)
     else:
         # Auto-find previous event by datetime
         previous_events = get_previous_events_by_datetime(conn, event_id, limit=1)
         prev_event_id = previous_events[0][0] if previous_events else None
-        prev_metrics = get_event_metrics(conn, prev_event_id) if prev_event_id else None
+
+    # Get metrics for the current (live) and previous (cacheable) event in one query
+    metrics_by_event = get_event_metrics_batch(
+        conn, [event_id], cached_event_ids=[prev_event_id] if prev_event_id else []
+    )
+    current_metrics = metrics_by_event.get(event_id)
+
+    if current_metrics is None:
+        print(f"Error: Could not find event {event_id}")
+        return
+
+    prev_metrics = metrics_by_event.get(prev_event_id) if prev_event_id else None
 
     # Calculate retention rates
     if selected_retention_event_ids is not None:
@@ -680,19 +804,8 @@ def main():
     # Add retention rates
     output.update(retention)
 
-    # Create DataFrame and save to CSV
-    output_df = pd.DataFrame([output])
-
-    # Check if file exists to determine append mode
-    file_exists = output_path.exists()
-
-    # Append if file exists, otherwise create new file
-    output_df.to_csv(
-        output_path,
-        mode='a' if file_exists else 'w',
-        header=not file_exists,
-        index=False
-    )
+    # Append the row to the shared output CSV (header only for a new file)
+    file_exists = append_output_row(output_path, output)
 
     # Display summary
     print(f"✅ Analysis complete!")
@@ -720,8 +833,6 @@ def main():
         if output['first_timers_pct_change'] is not None:
             print(f"  First timers change: {output['first_timers_pct_change']:+.1f}%")
 
-    conn.close()
-
 
 if __name__ == '__main__':
     main()
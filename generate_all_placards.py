@@ -4,31 +4,66 @@ Generate placard PDFs for all events in the analysis CSV and store them in the d
 
 This script:
 1. Reads all events from event_analysis_all.csv
-2. For each event:
+2. Builds the React app once and starts one long-lived Node.js renderer per
+   worker thread. For each event a worker:
    - Transforms the data to placard format
-   - Builds the React app and generates a PDF
+   - Has its renderer generate a PDF
+3. As each PDF comes back, the main thread:
    - Stores the PDF in the database
    - Optionally saves a copy with event-specific name (if --save-pdfs-dir is provided)
-   - Deletes the processed row from the CSV
-3. Handles errors gracefully and continues processing
+4. Deletes the processed rows from the CSV
+5. Handles errors gracefully and continues processing
 """
 
 import argparse
+import atexit
 import csv
+import io
+import json
+import logging
 import os
+import queue
+import re
+import struct
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from logging.handlers import QueueHandler, QueueListener
 import psycopg2
-import pandas as pd
-import shutil
+from psycopg2.extras import execute_values
 from pathlib import Path
 from dotenv import load_dotenv
 
+from transform_to_placard_csv import transform_event_to_placard_format
+
+# Load environment variables once, at import
+load_dotenv()
+
+# Rendered PDFs are written to the database this many at a time (one
+# statement, one commit)
+DB_BATCH_SIZE = 50
+
+# Sidecar next to the input CSV listing event IDs already stored, one per
+# line. Appended to as batches commit; the CSV itself is only rewritten once,
+# at the end of a clean run.
+PROCESSED_IDS_SUFFIX = '.processed'
+
+# Characters replaced with '_' in saved PDF filenames (anything but
+# letters, digits, space, '-' and '_')
+_BAD_FILENAME_CHARS_RE = re.compile(r'[^\w \-]')
+
+# Node renderer script inside the placard_generation directory
+GENERATE_PDF_SCRIPT = 'generate-pdf.mjs'
+
+# Concurrent S3 uploads per batch (with --pdf-bucket)
+S3_UPLOAD_WORKERS = 4
+
+# Signature, flags and header-extension length of a binary COPY stream
+COPY_BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+
 
 def connect_to_db():
     """Connect to Railway PostgreSQL database."""
-    load_dotenv()
-
     conn = psycopg2.connect(
         host=os.getenv('PGHOST'),
         port=os.getenv('PGPORT'),
@@ -40,168 +75,441 @@ def connect_to_db():
     return conn
 
 
-def customize_event_data(placard_csv_path, custom_title=None, custom_location=None):
+def setup_logging(verbose=False):
     """
-    Customize the title and/or location in the placard event data CSV.
+    Route all logging through a queue drained by one listener thread, so
+    worker threads never contend on (or interleave writes to) stdout.
+
+    Per-event progress is logged at DEBUG and only shown with --verbose.
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    log_queue = queue.Queue()
+    logging.basicConfig(level=logging.DEBUG if verbose else logging.INFO, handlers=[QueueHandler(log_queue)])
 
-    The placard CSV uses a key-value format with 'key' and 'value' columns.
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+
+def customize_event_data(placard_data, custom_title=None, custom_location=None):
+    """
+    Customize the title and/or location in the placard event data (in place).
 
     Args:
-        placard_csv_path: Path to the event_data.csv file
+        placard_data: Placard key-value dict from transform_event
         custom_title: Custom title to use (if provided)
         custom_location: Custom location to use (if provided)
+    """
+    # Update the title (eventName key)
+    if custom_title:
+        placard_data['eventName'] = custom_title
 
-    Returns:
-        bool: True if successful, False otherwise
+    # Update the location (venue key)
+    if custom_location:
+        placard_data['venue'] = custom_location
+
+    logging.debug("✓ Customized placard data")
+
+
+def transform_event(event_id, event_row):
     """
-    try:
-        # Read the key-value CSV
-        df = pd.read_csv(placard_csv_path)
+    Convert event analysis to placard format (in-process, no interpreter spawn).
 
-        # Update the title (eventName key)
-        if custom_title:
-            df.loc[df['key'] == 'eventName', 'value'] = custom_title
+    Args:
+        event_id: Event ID to transform
+        event_row: This event's analysis row (dict of CSV fields)
 
-        # Update the location (venue key)
-        if custom_location:
-            df.loc[df['key'] == 'venue', 'value'] = custom_location
+    Returns:
+        dict: Placard key-value data if successful, None otherwise
+    """
+    try:
+        placard_data = transform_event_to_placard_format(event_row)
 
-        # Write back in key-value format (only key and value columns)
-        df[['key', 'value']].to_csv(placard_csv_path, index=False)
-        print(f"  ✓ Customized placard data")
-        return True
+        logging.debug(f"✓ Transformed event {event_id} to placard format")
+        return placard_data
 
+    except ValueError as e:
+        logging.error(f"✗ Error transforming event {event_id}: {e}")
+        return None
     except Exception as e:
-        print(f"  ✗ Error customizing placard data: {e}", file=sys.stderr)
-        return False
+        logging.error(f"✗ Unexpected error transforming event {event_id}: {e}")
+        return None
 
 
-def transform_event(event_id, input_csv, placard_dir):
+def build_placard_app(placard_dir):
     """
-    Run the transform script to convert event analysis to placard format.
+    Build the React app once for the whole run.
 
     Args:
-        event_id: Event ID to transform
-        input_csv: Path to input CSV file
         placard_dir: Path to placard_generation directory
 
     Returns:
         bool: True if successful, False otherwise
     """
     try:
-        output_csv = os.path.join(placard_dir, 'public', 'event_data.csv')
-        transform_script = os.path.join(os.path.dirname(__file__), 'transform_to_placard_csv.py')
-
-        result = subprocess.run(
-            [
-                'python3',
-                transform_script,
-                '--event-id', str(event_id),
-                '--input-csv', input_csv,
-                '--output-csv', output_csv
-            ],
+        subprocess.run(
+            ['npm', 'run', 'build'],
             capture_output=True,
             text=True,
-            check=True
+            check=True,
+            cwd=placard_dir
         )
-
-        print(f"  ✓ Transformed event {event_id} to placard format")
+        logging.info("✓ Built placard app")
         return True
 
     except subprocess.CalledProcessError as e:
-        print(f"  ✗ Error transforming event {event_id}: {e.stderr}", file=sys.stderr)
+        logging.error(f"Error building placard app: {e.stderr}")
         return False
+
+
+class PlacardRenderer:
+    """
+    A warm `node generate-pdf.mjs --serve` process.
+
+    Puppeteer and Chromium are started once and reused for every PDF this
+    renderer generates. Each event's placard data is sent as a JSON line on
+    the child's stdin (nothing is written to disk); each reply is a JSON header line on stdout followed by the raw PDF bytes. Its
+    log output passes through on stderr.
+    """
+
+    def __init__(self, placard_dir):
+        # Resolved once; start() reuses it when a dead renderer is replaced
+        self.command = ['node', os.path.join(placard_dir, GENERATE_PDF_SCRIPT), '--serve', '--cwd', placard_dir]
+        self.proc = None
+        self.start()
+
+    def start(self):
+        self.proc = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+
+    def render(self, event_data):
+        """Render the placard data dict event_data and return the PDF bytes; raises RuntimeError on failure."""
+        # Replace a renderer that has died (e.g. Chromium crashed) before reuse
+        if self.proc.poll() is not None:
+            self.start()
+
+        self.proc.stdin.write(json.dumps({'eventData': event_data}).encode() + b'\n')
+        self.proc.stdin.flush()
+
+        header = self.proc.stdout.readline()
+        if not header:
+            raise RuntimeError(f"renderer exited with code {self.proc.wait()}")
+
+        header = json.loads(header)
+        if not header['ok']:
+            raise RuntimeError(header['error'])
+
+        pdf_binary = self.proc.stdout.read(header['size'])
+        if len(pdf_binary) != header['size']:
+            raise RuntimeError(f"renderer exited with code {self.proc.wait()} mid-PDF")
+        return pdf_binary
+
+    def close(self):
+        # Closing stdin ends the job loop; the renderer then shuts Chromium down
+        self.proc.stdin.close()
+        try:
+            self.proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+def generate_pdf(renderer, event_data):
+    """
+    Generate a PDF from placard event data using a warm Node.js renderer.
+
+    Args:
+        renderer: PlacardRenderer to render with
+        event_data: Placard key-value dict
+
+    Returns:
+        PDF bytes if successful, None otherwise
+    """
+    try:
+        pdf_binary = renderer.render(event_data)
+
+        logging.debug("✓ Generated PDF")
+        return pdf_binary
+
     except Exception as e:
-        print(f"  ✗ Unexpected error transforming event {event_id}: {e}", file=sys.stderr)
-        return False
+        logging.error(f"✗ Error generating PDF: {e}")
+        return None
 
 
-def generate_pdf(placard_dir):
+def process_event(event_id, event_name, event_row, workers, customization=None):
     """
-    Build the React app and generate a PDF using Node.js.
+    Transform and render one event's placard (runs on a worker thread).
 
     Args:
-        placard_dir: Path to placard_generation directory
+        event_id: Event ID
+        event_name: Event name (for progress output)
+        event_row: This event's analysis row (dict of CSV fields)
+        workers: Queue of free PlacardRenderers
+        customization: Optional (custom_title, custom_location) tuple
 
     Returns:
-        Path to generated PDF if successful, None otherwise
+        tuple: (event_id, pdf_bytes, error) where pdf_bytes is None and error
+        describes the failed step if the event could not be rendered
     """
+    renderer = workers.get()
     try:
-        # Change to placard directory
-        original_dir = os.getcwd()
-        os.chdir(placard_dir)
+        logging.debug(f"Processing event {event_id}: {event_name}")
 
-        # Run the generate-pdf script
-        result = subprocess.run(
-            ['node', 'generate-pdf.mjs'],
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        # Step 1: Transform to placard format
+        placard_data = transform_event(event_id, event_row)
+        if placard_data is None:
+            return event_id, None, 'transform error'
 
-        print(f"  ✓ Generated PDF")
+        # Step 1.5: Apply customization if requested
+        if customization:
+            custom_title, custom_location = customization
+            customize_event_data(placard_data, custom_title, custom_location)
 
-        # Return to original directory
-        os.chdir(original_dir)
+        # Step 2: Generate PDF (the data goes over the renderer's stdin and the
+        # bytes come straight back over its stdout)
+        pdf_binary = generate_pdf(renderer, placard_data)
+        if not pdf_binary:
+            return event_id, None, 'PDF generation error'
 
-        # Return path to generated PDF
-        pdf_path = os.path.join(placard_dir, 'event-report.pdf')
-        if os.path.exists(pdf_path):
-            return pdf_path
-        else:
-            print(f"  ✗ PDF file not found at {pdf_path}", file=sys.stderr)
-            return None
+        return event_id, pdf_binary, None
+    finally:
+        workers.put(renderer)
+
+
+def prompt_customization(event_name, event_location):
+    """
+    Ask the user for a custom title and location for one event.
+
+    Returns:
+        (custom_title, custom_location) tuple with None for kept values,
+        or None if nothing was customized
+    """
+    print(f"\n  Current title: {event_name}")
+    print(f"  Current location: {event_location}\n")
+
+    custom_title = input("  Enter custom title (or press Enter to keep current): ").strip()
+    custom_location = input("  Enter custom location (or press Enter to keep current): ").strip()
+    print()  # Add blank line for readability
+
+    # Only customize if user provided values
+    if custom_title or custom_location:
+        return (custom_title if custom_title else None, custom_location if custom_location else None)
+    return None
+
+
+def encode_copy_binary(pdfs):
+    """
+    Encode (event_id, pdf_binary) rows in PostgreSQL's binary COPY format.
+
+    The PDF bytes are copied through as-is, with no hex escaping.
+    """
+    buffer = io.BytesIO()
+    buffer.write(COPY_BINARY_HEADER)
+    for event_id, pdf_binary in pdfs:
+        # Field count, then each field as (length, bytes): int4 id, bytea pdf
+        buffer.write(struct.pack('!hii', 2, 4, int(event_id)))
+        buffer.write(struct.pack('!i', len(pdf_binary)))
+        buffer.write(pdf_binary)
+    buffer.write(struct.pack('!h', -1))
+    buffer.seek(0)
+    return buffer
+
+
+def prepare_placard_statements(cur):
+    """
+    Set up this session's placard upload: the temporary staging table and the
+    prepared UPDATE that applies it, so neither is re-created or re-planned
+    per batch.
+
+    Args:
+        cur: The run's database cursor
+    """
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS placard_staging (
+            id INTEGER PRIMARY KEY,
+            placard_pdf BYTEA NOT NULL
+        ) ON COMMIT DELETE ROWS
+    """)
+    cur.execute("""
+        PREPARE upd_placard AS
+        UPDATE events AS e
+        SET placard_pdf = s.placard_pdf
+        FROM placard_staging s
+        WHERE e.id = s.id
+    """)
+    cur.connection.commit()
+
+
+def store_pdfs_in_db(cur, pdfs):
+    """
+    Store a batch of PDF binaries in the database with one commit.
+
+    The PDFs are streamed into the session's staging table with a binary COPY
+    and applied to events with the prepared upd_placard statement (see
+    prepare_placard_statements).
+
+    Args:
+        cur: The run's database cursor
+        pdfs: List of (event_id, pdf_binary) tuples
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        cur.copy_expert(
+            "COPY placard_staging (id, placard_pdf) FROM STDIN WITH (FORMAT binary)",
+            encode_copy_binary(pdfs)
+        )
+        cur.execute("EXECUTE upd_placard")
+        cur.connection.commit()
+
+        total_bytes = sum(len(pdf_binary) for _, pdf_binary in pdfs)
+        logging.info(f"✓ Stored {len(pdfs)} PDF(s) in database ({total_bytes} bytes)")
+        return True
 
-    except subprocess.CalledProcessError as e:
-        print(f"  ✗ Error generating PDF: {e.stderr}", file=sys.stderr)
-        os.chdir(original_dir)
-        return None
     except Exception as e:
-        print(f"  ✗ Unexpected error generating PDF: {e}", file=sys.stderr)
-        os.chdir(original_dir)
-        return None
+        logging.error(f"✗ Error storing PDFs in database: {e}")
+        cur.connection.rollback()
+        return False
 
 
-def store_pdf_in_db(conn, event_id, pdf_path):
+def upload_pdf(s3, bucket, event_id, pdf_binary):
     """
-    Store the PDF binary in the database.
+    Upload one PDF to S3 and return its URL.
 
     Args:
-        conn: Database connection
+        s3: boto3 S3 client
+        bucket: Bucket name
         event_id: Event ID
-        pdf_path: Path to PDF file
+        pdf_binary: PDF file contents
+
+    Returns:
+        str: s3:// URL of the uploaded object
+    """
+    key = f"placards/{event_id}.pdf"
+    s3.put_object(Bucket=bucket, Key=key, Body=pdf_binary, ContentType='application/pdf')
+    return f"s3://{bucket}/{key}"
+
+
+def store_pdf_urls_in_db(cur, urls):
+    """
+    Point a batch of events at their uploaded PDFs with one statement and one commit.
+
+    The inline placard_pdf copy is cleared so the bytes only live in object storage.
+
+    Args:
+        cur: The run's database cursor
+        urls: List of (event_id, url) tuples
 
     Returns:
         bool: True if successful, False otherwise
     """
     try:
-        with open(pdf_path, 'rb') as f:
-            pdf_binary = f.read()
-
-        cur = conn.cursor()
-        cur.execute(
-            "UPDATE events SET placard_pdf = %s WHERE id = %s",
-            (psycopg2.Binary(pdf_binary), event_id)
+        execute_values(
+            cur,
+            """
+            UPDATE events AS e
+            SET placard_url = v.url, placard_pdf = NULL
+            FROM (VALUES %s) AS v (id, url)
+            WHERE e.id = v.id
+            """,
+            [(int(event_id), url) for event_id, url in urls],
+            page_size=len(urls)
         )
-        conn.commit()
-        cur.close()
+        cur.connection.commit()
 
-        print(f"  ✓ Stored PDF in database for event {event_id} ({len(pdf_binary)} bytes)")
+        logging.info(f"✓ Stored {len(urls)} PDF URL(s) in database")
         return True
 
     except Exception as e:
-        print(f"  ✗ Error storing PDF in database: {e}", file=sys.stderr)
-        conn.rollback()
+        logging.error(f"✗ Error storing PDF URLs in database: {e}")
+        cur.connection.rollback()
         return False
 
 
-def save_pdf_copy(pdf_path, output_dir, event_id, event_name):
+def upload_pdfs(cur, s3, bucket, pdfs):
+    """
+    Upload a batch of PDFs to S3, then record their URLs in the database.
+
+    Args:
+        cur: The run's database cursor
+        s3: boto3 S3 client
+        bucket: Bucket name
+        pdfs: List of (event_id, pdf_binary) tuples
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        # boto3 clients are thread-safe; upload the batch concurrently
+        with ThreadPoolExecutor(max_workers=S3_UPLOAD_WORKERS) as uploads:
+            uploaded = uploads.map(lambda pdf: upload_pdf(s3, bucket, *pdf), pdfs)
+            urls = [(event_id, url) for (event_id, _), url in zip(pdfs, uploaded)]
+    except Exception as e:
+        logging.error(f"✗ Error uploading PDFs to bucket {bucket}: {e}")
+        return False
+
+    return store_pdf_urls_in_db(cur, urls)
+
+
+def flush_pdf_batch(cur, batch, pending_rows, processed_log, save_pdfs_dir, s3=None, pdf_bucket=None):
+    """
+    Commit a batch of rendered PDFs and retire their rows.
+
+    Args:
+        cur: The run's database cursor
+        batch: List of (row_indices, event_id, event_name, pdf_binary) tuples,
+            row_indices being every CSV row of the event
+        pending_rows: Dict of row_index -> CSV row still to be processed
+            (stored rows are removed from it)
+        processed_log: Open sidecar file the stored event IDs are appended to
+        save_pdfs_dir: Optional directory to save PDF copies to
+        s3: boto3 S3 client (only with pdf_bucket)
+        pdf_bucket: Optional S3 bucket to store the PDFs in instead of the
+            placard_pdf column
+
+    Returns:
+        int: Number of events stored (0 if the batch failed)
+    """
+    if not batch:
+        return 0
+
+    # Step 3: Store in database (or in the bucket, with only the URL in the database)
+    pdfs = [(event_id, pdf_binary) for _, event_id, _, pdf_binary in batch]
+    stored = upload_pdfs(cur, s3, pdf_bucket, pdfs) if pdf_bucket else store_pdfs_in_db(cur, pdfs)
+    if not stored:
+        event_ids = [event_id for _, event_id, _, _ in batch]
+        logging.warning(f"⚠ Skipping events {event_ids} due to database error")
+        return 0
+
+    for row_indices, event_id, event_name, pdf_binary in batch:
+        # Step 4: Optionally save PDF copy to directory
+        if save_pdfs_dir:
+            if not save_pdf_copy(pdf_binary, save_pdfs_dir, event_id, event_name):
+                logging.warning(f"⚠ Warning: Could not save PDF copy for event {event_id}")
+                # Don't fail - the PDF is already in the database
+
+        # Step 5: Drop the rows in memory and record the event as done, so a
+        # crash only re-renders the events since this batch
+        for idx in row_indices:
+            del pending_rows[idx]
+        processed_log.write(f"{event_id}\n")
+
+    logging.info(f"✅ Successfully processed {len(batch)} event(s)")
+    return len(batch)
+
+
+def save_pdf_copy(pdf_binary, output_dir, event_id, event_name):
     """
     Save a copy of the PDF to the output directory with an event-specific name.
 
     Args:
-        pdf_path: Path to the generated PDF
-        output_dir: Directory to save the PDF copy
+        pdf_binary: Contents of the generated PDF
+        output_dir: Existing directory to save the PDF copy to
         event_id: Event ID
         event_name: Event name
 
@@ -209,54 +517,75 @@ def save_pdf_copy(pdf_path, output_dir, event_id, event_name):
         bool: True if successful, False otherwise
     """
     try:
-        # Create output directory if it doesn't exist
-        os.makedirs(output_dir, exist_ok=True)
-
         # Clean event name for filename (remove special characters)
-        clean_name = "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in event_name)
-        clean_name = clean_name.replace(' ', '_')
+        clean_name = _BAD_FILENAME_CHARS_RE.sub('_', event_name).replace(' ', '_')
 
         # Create filename with event ID and name
         filename = f"event_{event_id}_{clean_name}.pdf"
         output_path = os.path.join(output_dir, filename)
 
-        # Copy the PDF
-        shutil.copy2(pdf_path, output_path)
+        # Write the rendered bytes straight to their final name
+        Path(output_path).write_bytes(pdf_binary)
 
-        print(f"  ✓ Saved PDF to {output_path}")
+        logging.debug(f"✓ Saved PDF to {output_path}")
         return True
 
     except Exception as e:
-        print(f"  ✗ Error saving PDF copy: {e}", file=sys.stderr)
+        logging.error(f"✗ Error saving PDF copy: {e}")
         return False
 
 
-def delete_row_from_csv(csv_path, event_id):
+def load_processed_ids(processed_path):
+    """Return the event IDs recorded in the processed-IDs sidecar (empty if none)."""
+    if not os.path.exists(processed_path):
+        return set()
+
+    with open(processed_path) as f:
+        return set(map(int, f.read().split()))
+
+
+def find_stored_event_ids(cur, event_ids, column):
     """
-    Delete the processed row from the CSV file.
+    Return which of the given events already have a placard stored, in one query.
 
     Args:
-        csv_path: Path to CSV file
-        event_id: Event ID to delete
+        cur: The run's database cursor
+        event_ids: Event IDs about to be rendered
+        column: Column that holds the stored placard ('placard_pdf' or 'placard_url')
 
     Returns:
-        bool: True if successful, False otherwise
+        set: Event IDs whose column is already set
     """
-    try:
-        # Read all rows
-        df = pd.read_csv(csv_path)
+    cur.execute(
+        f"SELECT id FROM events WHERE {column} IS NOT NULL AND id = ANY(%s)",
+        (list(event_ids),)
+    )
+    stored = {row[0] for row in cur.fetchall()}
+    cur.connection.commit()
+    return stored
+
 
-        # Filter out the processed event
-        df_filtered = df[df['event_id'] != event_id]
+def save_remaining_rows(fieldnames, rows, csv_path):
+    """
+    Write the rows that still need processing back to the CSV file.
 
-        # Write back to CSV
-        df_filtered.to_csv(csv_path, index=False)
+    Args:
+        fieldnames: CSV header
+        rows: CSV rows (dicts) that have not been processed yet
+        csv_path: Path to CSV file
 
-        print(f"  ✓ Deleted event {event_id} from CSV")
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
         return True
 
     except Exception as e:
-        print(f"  ✗ Error deleting row from CSV: {e}", file=sys.stderr)
+        logging.error(f"✗ Error writing remaining rows to CSV: {e}")
         return False
 
 
@@ -284,8 +613,32 @@ def main():
         action='store_true',
         help='Enable interactive customization of title and location for each event'
     )
+    parser.add_argument(
+        '--pdf-bucket',
+        default=None,
+        help='Optional: S3 bucket to store PDFs in (under placards/). Only the URL is kept in events.placard_url. Requires boto3.'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of events to render in parallel (default: number of CPUs)'
+    )
+
+    parser.add_argument(
+        '--regenerate',
+        action='store_true',
+        help='Re-render events that already have a placard stored in the database'
+    )
+
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='Log every step of every event, not just batch progress and errors'
+    )
 
     args = parser.parse_args()
+    setup_logging(args.verbose)
 
     # Resolve paths
     input_csv = os.path.abspath(args.input_csv)
@@ -294,109 +647,190 @@ def main():
 
     # Verify paths exist
     if not os.path.exists(input_csv):
-        print(f"Error: Input CSV not found: {input_csv}", file=sys.stderr)
+        logging.error(f"Error: Input CSV not found: {input_csv}")
         sys.exit(1)
 
     if not os.path.exists(placard_dir):
-        print(f"Error: Placard directory not found: {placard_dir}", file=sys.stderr)
+        logging.error(f"Error: Placard directory not found: {placard_dir}")
         sys.exit(1)
 
+    s3 = None
+    if args.pdf_bucket:
+        import boto3
+        s3 = boto3.client('s3')
+        logging.info(f"PDFs will be uploaded to s3://{args.pdf_bucket}/placards/")
+
     # Log whether we're saving PDFs
     if save_pdfs_dir:
-        print(f"PDFs will be saved to: {save_pdfs_dir}")
+        os.makedirs(save_pdfs_dir, exist_ok=True)
+        logging.info(f"PDFs will be saved to: {save_pdfs_dir}")
     else:
-        print("PDFs will only be stored in the database (not saved to disk)")
+        logging.info("PDFs will only be stored in the database (not saved to disk)")
 
     # Connect to database
-    print("Connecting to database...")
+    logging.info("Connecting to database...")
     try:
         conn = connect_to_db()
-        print("✓ Connected to database\n")
+        # One cursor for the whole run; it is only ever used from the
+        # uploader thread once rendering starts
+        cur = conn.cursor()
+        prepare_placard_statements(cur)
+        logging.info("✓ Connected to database")
     except Exception as e:
-        print(f"Error connecting to database: {e}", file=sys.stderr)
+        logging.error(f"Error connecting to database: {e}")
         sys.exit(1)
 
-    # Read CSV
+    # Read CSV (plain rows; only the transform needs the values, as strings),
+    # skipping events a previous, interrupted run already stored
+    processed_path = input_csv + PROCESSED_IDS_SUFFIX
     try:
-        df = pd.read_csv(input_csv)
-        total_events = len(df)
-        print(f"Found {total_events} events to process\n")
+        already_processed = load_processed_ids(processed_path)
+        with open(input_csv, newline='') as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames
+            pending_rows = {
+                idx: row for idx, row in enumerate(reader)
+                if int(row['event_id']) not in already_processed
+            }
+
+        # The CSV is only ever appended to, so an event analyzed more than once
+        # has several rows; render its latest row and retire the older ones
+        # with it
+        event_row_indices = {}
+        for idx, row in pending_rows.items():
+            event_row_indices.setdefault(int(row['event_id']), []).append(idx)
+        if len(event_row_indices) < len(pending_rows):
+            logging.info(f"Using the latest of {len(pending_rows)} rows for {len(event_row_indices)} events")
+
+        if not args.regenerate and event_row_indices:
+            # One round-trip instead of a wasted render per event that already
+            # has a placard. Its rows stay in the CSV (a re-analyzed event's
+            # placard may be stale), so --regenerate can still render them.
+            stored_column = 'placard_url' if args.pdf_bucket else 'placard_pdf'
+            already_stored = find_stored_event_ids(cur, list(event_row_indices), stored_column)
+            for event_id in already_stored:
+                del event_row_indices[event_id]
+            if already_stored:
+                logging.warning(
+                    f"⚠ Skipping {len(already_stored)} event(s) whose placard is already stored, "
+                    f"keeping their rows in the CSV (re-run with --regenerate to render them): "
+                    f"{sorted(already_stored)}"
+                )
+        total_events = len(event_row_indices)
+        if already_processed:
+            logging.info(f"Skipping {len(already_processed)} event(s) already processed by a previous run")
+        logging.info(f"Found {total_events} events to process")
     except Exception as e:
-        print(f"Error reading CSV: {e}", file=sys.stderr)
+        logging.error(f"Error reading CSV: {e}")
         conn.close()
         sys.exit(1)
 
-    # Process each event
+    # Collect customizations up front so the workers never block on input()
+    customizations = {}
+    if args.customize:
+        for row_indices in event_row_indices.values():
+            row = pending_rows[row_indices[-1]]
+            event_name = row.get('event_name') or 'Unknown'
+            print(f"Event {row['event_id']}: {event_name}")
+            customization = prompt_customization(event_name, row.get('location') or 'Unknown')
+            if customization:
+                customizations[int(row['event_id'])] = customization
+
+    # Process events in parallel; rendering is subprocess-bound, so threads suffice
     processed = 0
     failed = 0
+    batch = []
+    flushes = []
 
-    for idx, row in df.iterrows():
-        event_id = row['event_id']
-        event_name = row.get('event_name', 'Unknown')
-        event_location = row.get('location', 'Unknown')
-
-        print(f"[{idx + 1}/{total_events}] Processing event {event_id}: {event_name}")
+    # Batches are stored on a single background thread (so the one database
+    # connection is never shared) while the main thread keeps collecting renders
+    uploader = ThreadPoolExecutor(max_workers=1)
 
-        # Step 1: Transform to placard format
-        if not transform_event(event_id, input_csv, placard_dir):
-            print(f"  ⚠ Skipping event {event_id} due to transform error\n")
-            failed += 1
-            continue
-
-        # Step 1.5: Customize if requested
-        if args.customize:
-            print(f"\n  Current title: {event_name}")
-            print(f"  Current location: {event_location}\n")
-
-            custom_title = input("  Enter custom title (or press Enter to keep current): ").strip()
-            custom_location = input("  Enter custom location (or press Enter to keep current): ").strip()
-
-            # Only customize if user provided values
-            if custom_title or custom_location:
-                placard_csv = os.path.join(placard_dir, 'public', 'event_data.csv')
-                if not customize_event_data(
-                    placard_csv,
-                    custom_title if custom_title else None,
-                    custom_location if custom_location else None
-                ):
-                    print(f"  ⚠ Warning: Could not customize event data for event {event_id}")
-            print()  # Add blank line for readability
-
-        # Step 2: Generate PDF
-        pdf_path = generate_pdf(placard_dir)
-        if not pdf_path:
-            print(f"  ⚠ Skipping event {event_id} due to PDF generation error\n")
-            failed += 1
-            continue
-
-        # Step 3: Store in database
-        if not store_pdf_in_db(conn, event_id, pdf_path):
-            print(f"  ⚠ Skipping event {event_id} due to database error\n")
-            failed += 1
-            continue
+    num_workers = min(total_events, max(1, args.workers or os.cpu_count() or 1))
+    renderers = []
+    processed_log = open(processed_path, 'a', buffering=1)
 
-        # Step 4: Optionally save PDF copy to directory
-        if save_pdfs_dir:
-            if not save_pdf_copy(pdf_path, save_pdfs_dir, event_id, event_name):
-                print(f"  ⚠ Warning: Could not save PDF copy for event {event_id}")
-                # Don't fail - the PDF is already in the database
-
-        # Step 5: Delete row from CSV
-        if not delete_row_from_csv(input_csv, event_id):
-            print(f"  ⚠ Warning: Could not delete row for event {event_id} from CSV")
-            # Don't fail - the PDF is already stored
-            # The row will remain and might be reprocessed next time
-
-        processed += 1
-        print(f"  ✅ Successfully processed event {event_id}\n")
+    try:
+        # Build once; the renderers serve the built app and inject each
+        # event's data, so nothing is rebuilt per event
+        if total_events and not build_placard_app(placard_dir):
+            conn.close()
+            sys.exit(1)
+
+        workers = queue.Queue()
+        for _ in range(num_workers):
+            renderer = PlacardRenderer(placard_dir)
+            renderers.append(renderer)
+            workers.put(renderer)
+
+        logging.info(f"Rendering with {num_workers} worker(s)")
+
+        with ThreadPoolExecutor(max_workers=max(1, num_workers)) as executor:
+            # Hand each worker its row; the CSV is parsed once for the whole run
+            futures = {}
+            for event_id, row_indices in event_row_indices.items():
+                row = pending_rows[row_indices[-1]]
+                event_name = row.get('event_name') or 'Unknown'
+                future = executor.submit(
+                    process_event, event_id, event_name, row, workers, customizations.get(event_id)
+                )
+                futures[future] = (row_indices, event_name)
+
+            # Finished PDFs are collected here on the main thread and written
+            # to the database in batches
+            for done, future in enumerate(as_completed(futures), start=1):
+                row_indices, event_name = futures[future]
+                event_id, pdf_binary, error = future.result()
+
+                logging.info(f"[{done}/{total_events}] Finished rendering event {event_id}: {event_name}")
+
+                if error:
+                    logging.warning(f"⚠ Skipping event {event_id} due to {error}")
+                    failed += 1
+                    continue
+
+                logging.debug(f"✓ Rendered PDF for event {event_id} ({len(pdf_binary)} bytes)")
+                batch.append((row_indices, event_id, event_name, pdf_binary))
+
+                if len(batch) >= DB_BATCH_SIZE:
+                    flushes.append((uploader.submit(
+                        flush_pdf_batch, cur, batch, pending_rows, processed_log, save_pdfs_dir, s3, args.pdf_bucket
+                    ), len(batch)))
+                    batch = []
+
+        # Store whatever is left of the last batch, then wait for every batch
+        flushes.append((uploader.submit(
+            flush_pdf_batch, cur, batch, pending_rows, processed_log, save_pdfs_dir, s3, args.pdf_bucket
+        ), len(batch)))
+        batch = []
+
+        for flush, batch_size in flushes:
+            stored = flush.result()
+            processed += stored
+            failed += batch_size - stored
+    finally:
+        uploader.shutdown(wait=True)
+        cur.close()
+        processed_log.close()
+        for renderer in renderers:
+            renderer.close()
+
+    # Step 6: Clean finish - rewrite the CSV once without the processed rows
+    # and drop the sidecar
+    if save_remaining_rows(fieldnames, pending_rows.values(), input_csv):
+        os.remove(processed_path)
+    else:
+        logging.warning("⚠ Warning: Could not delete processed rows from CSV")
+        # Don't fail - the PDFs are already stored and the sidecar still
+        # records them, so the next run skips them
 
     # Summary
-    print("\n" + "=" * 60)
-    print(f"Processing complete!")
-    print(f"  Total events: {total_events}")
-    print(f"  Successfully processed: {processed}")
-    print(f"  Failed: {failed}")
-    print("=" * 60)
+    logging.info("=" * 60)
+    logging.info("Processing complete!")
+    logging.info(f"Total events: {total_events}")
+    logging.info(f"Successfully processed: {processed}")
+    logging.info(f"Failed: {failed}")
+    logging.info("=" * 60)
 
     conn.close()
 
@@ -6,15 +6,21 @@ Mimics logic from raw_csv_to_sql.py for person matching and data import
 """
 
 import os
+import io
+import csv
 import sys
 import json
 import logging
 import argparse
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import execute_values
+from collections import Counter
+from functools import lru_cache
 from datetime import datetime
-from difflib import SequenceMatcher
-from dotenv import load_dotenv
+import numpy as np
+from rapidfuzz import process, fuzz
+
+from db import get_pool, close_pool
 
 # Configure logging
 logging.basicConfig(
@@ -22,18 +28,6 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-# Load environment variables
-load_dotenv()
-
-# Database connection parameters
-DB_CONFIG = {
-    'host': os.getenv('PGHOST'),
-    'port': os.getenv('PGPORT'),
-    'database': os.getenv('PGDATABASE'),
-    'user': os.getenv('PGUSER'),
-    'password': os.getenv('PGPASSWORD')
-}
-
 # JSON field mappings for Luma API response
 # These map our internal field names to the Luma API JSON field names
 # NOTE: Custom fields (gender, school, class_year) are in registration_answers, not top-level
@@ -52,44 +46,76 @@ JSON_FIELD_MAPPING = {
 # Fuzzy matching threshold
 FUZZY_MATCH_THRESHOLD = 0.80
 
-# Connection refresh interval (refresh every N rows to prevent timeout)
-CONNECTION_REFRESH_INTERVAL = 50
+# Rows fetched per round-trip when loading the people index
+PEOPLE_INDEX_ITERSIZE = 5000
+
+# Guests staged in memory before their writes are flushed (each event still
+# commits once, at the end)
+IMPORT_BATCH_SIZE = 500
+
+# Gender answers mapped to their stored code
+GENDER_CODES = {
+    'f': 'F', 'female': 'F', 'woman': 'F', 'girl': 'F',
+    'm': 'M', 'male': 'M', 'man': 'M', 'boy': 'M',
+}
+
+# Grade-level keywords and years until graduation, checked in order
+GRADE_LEVEL_OFFSETS = (
+    (('freshman', 'first', '1st'), 4),
+    (('sophomore', 'second', '2nd'), 3),
+    (('junior', 'third', '3rd'), 2),
+    (('senior', 'fourth', '4th'), 1),
+)
+
+# Tracking codes that don't represent personal referrals
+GENERIC_REFERRAL_CODES = frozenset({
+    'default', 'emailreferral', 'email_first_button',
+    'email_second_button', 'email', 'txt', 'insta',
+    'maillist', 'lastname', '[name]'
+})
+
+# Tracking codes stored as the mailing-list invite token
+GENERIC_INVITE_CODES = frozenset({'default', 'emailreferral', 'email', 'instagram', 'facebook'})
+
+# Tracking codes not shown as a referral code by --log-people
+GENERIC_LOG_CODES = frozenset({'default', 'email', 'txt', 'insta', 'maillist'})
 
 
 def get_db_connection():
-    """Create and return a database connection"""
+    """Borrow a database connection from the shared pool (see db.py)"""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
+        return get_pool().getconn()
     except Exception as e:
         logging.error(f"Failed to connect to database: {e}")
         sys.exit(1)
 
 
-def ensure_connection(conn, force_refresh=False):
+def release_db_connection(conn, close=False):
     """
-    Test and refresh connection if needed. Returns valid connection.
+    Hand a connection back to the pool, rolling back anything uncommitted.
+
+    Args:
+        conn: Connection from get_db_connection
+        close: If True, close it instead of keeping it for reuse
+    """
+    if not conn.closed and not close:
+        conn.rollback()
+    get_pool().putconn(conn, close=close)
+
+
+def ensure_connection(conn):
+    """
+    Test the connection and reconnect if it was lost. Returns valid connection.
+
+    Idle connections are kept alive by the TCP keepalive settings in db.py;
+    this is only the fallback for a connection that dropped anyway.
 
     Args:
         conn: Current database connection
-        force_refresh: If True, force a connection refresh
 
     Returns:
         Valid database connection
     """
-    if force_refresh:
-        logging.info("🔄 Refreshing connection...")
-        try:
-            # Commit any pending work before closing
-            conn.commit()
-            conn.close()
-        except (psycopg2.Error, Exception) as e:
-            # Connection already closed or in bad state
-            pass
-        new_conn = get_db_connection()
-        logging.info("✓ Connection refreshed successfully")
-        return new_conn
-
     try:
         cursor = conn.cursor()
         cursor.execute("SELECT 1")
@@ -97,11 +123,7 @@ def ensure_connection(conn, force_refresh=False):
         return conn
     except (psycopg2.OperationalError, psycopg2.InterfaceError):
         logging.warning("⚠️  Connection lost, reconnecting...")
-        try:
-            conn.close()
-        except (psycopg2.Error, Exception) as e:
-            # Connection already closed
-            pass
+        release_db_connection(conn, close=True)
         return get_db_connection()
 
 
@@ -127,35 +149,21 @@ def na_to_none(value):
     return value
 
 
-def get_registration_answer(guest_data, question_label, case_sensitive=False):
+def get_registration_answer(guest, *question_labels):
     """
-    Extract answer from registration_answers array by question label.
-
-    Custom fields in Luma API are stored in a registration_answers array like:
-    [
-        {"label": "School email (.edu)", "value": "student@harvard.edu"},
-        {"label": "What brings you to Camel?", "value": "..."}
-    ]
+    Extract answer from a guest's registration answers by question label.
 
     Args:
-        guest_data: Guest data dictionary from Luma API
-        question_label: The question label to search for
-        case_sensitive: If True, use exact case matching (default: False)
+        guest: Guest fields from extract_guest_fields
+        question_labels: Question labels to try in order (case-insensitive)
 
     Returns:
-        The answer value if found, None otherwise
+        The first answer found, None otherwise
     """
-    registration_answers = guest_data.get('registration_answers', [])
-
-    for answer in registration_answers:
-        answer_label = answer.get('label', '')
-
-        if case_sensitive:
-            if answer_label == question_label:
-                return na_to_none(answer.get('value'))
-        else:
-            if answer_label.lower() == question_label.lower():
-                return na_to_none(answer.get('value'))
+    for question_label in question_labels:
+        answer = guest['answers'].get(question_label.lower())
+        if answer:
+            return answer
 
     return None
 
@@ -183,6 +191,38 @@ def get_all_registration_answers(guest_data):
     return answers_dict if answers_dict else None
 
 
+def extract_guest_fields(guest_data):
+    """
+    Read everything the import uses from a guest's JSON in one pass.
+
+    Custom fields in Luma API are stored in a registration_answers array like:
+    [
+        {"label": "School email (.edu)", "value": "student@harvard.edu"},
+        {"label": "What brings you to Camel?", "value": "..."}
+    ]
+
+    Args:
+        guest_data: Guest data dictionary from Luma API
+
+    Returns:
+        dict: Each JSON_FIELD_MAPPING field (None if blank), plus 'answers'
+        (lowercased question label -> answer; the first answer to a label
+        wins) and 'additional_info' (from get_all_registration_answers)
+    """
+    guest = {
+        field: na_to_none(guest_data.get(json_field))
+        for field, json_field in JSON_FIELD_MAPPING.items()
+    }
+
+    answers = {}
+    for answer in guest_data.get('registration_answers', []):
+        answers.setdefault((answer.get('label') or '').lower(), na_to_none(answer.get('value')))
+    guest['answers'] = answers
+
+    guest['additional_info'] = get_all_registration_answers(guest_data)
+    return guest
+
+
 def split_full_name(full_name):
     """
     Split a full name into first_name and last_name.
@@ -229,14 +269,7 @@ def normalize_gender(gender_str):
     if not gender_str:
         return None
 
-    gender_lower = str(gender_str).lower().strip()
-
-    if gender_lower in ['f', 'female', 'woman', 'girl']:
-        return 'F'
-    elif gender_lower in ['m', 'male', 'man', 'boy']:
-        return 'M'
-    else:
-        return None
+    return GENDER_CODES.get(str(gender_str).lower().strip())
 
 
 def normalize_school(school_str, email_str=None):
@@ -246,20 +279,28 @@ def normalize_school(school_str, email_str=None):
     """
     # First check email domain (highest priority)
     if email_str and isinstance(email_str, str):
-        email_lower = email_str.lower()
-        if '@harvard.edu' in email_lower or '@college.harvard.edu' in email_lower:
+        email_lower = email_str.strip().lower()
+        if email_lower.endswith(('@harvard.edu', '@college.harvard.edu')):
             return 'harvard'
-        elif '@mit.edu' in email_lower:
+        elif email_lower.endswith('@mit.edu'):
             return 'mit'
-        elif '.edu' in email_lower:
+        elif email_lower.endswith('.edu'):
             return 'other'
 
     # Then check school string
     if not school_str:
         return None
 
-    school_lower = str(school_str).lower()
+    return normalize_school_name(str(school_str).lower())
+
+
+@lru_cache(maxsize=None)
+def normalize_school_name(school_lower):
+    """
+    Normalize a lowercased school answer to harvard/mit/other/None.
 
+    Guests give only a handful of distinct answers, so results are memoized.
+    """
     # Check for Harvard (but not business school)
     if 'harvard' in school_lower:
         if 'business' not in school_lower and 'hbs' not in school_lower:
@@ -282,8 +323,15 @@ def normalize_class_year(year_str):
     if not year_str:
         return None
 
-    year_str = str(year_str).lower().strip()
+    return parse_class_year(str(year_str).lower().strip())
+
 
+@lru_cache(maxsize=None)
+def parse_class_year(year_str):
+    """
+    Parse a lowercased, stripped class year answer (memoized, like
+    normalize_school_name).
+    """
     # Try 4-digit year
     if year_str.isdigit() and len(year_str) == 4:
         return int(year_str)
@@ -297,14 +345,9 @@ def normalize_class_year(year_str):
     current_year = now.year if now.month >= 9 else now.year - 1
 
     # Grade levels
-    if any(x in year_str for x in ['freshman', 'first', '1st']):
-        return current_year + 4
-    elif any(x in year_str for x in ['sophomore', 'second', '2nd']):
-        return current_year + 3
-    elif any(x in year_str for x in ['junior', 'third', '3rd']):
-        return current_year + 2
-    elif any(x in year_str for x in ['senior', 'fourth', '4th']):
-        return current_year + 1
+    for keywords, offset in GRADE_LEVEL_OFFSETS:
+        if any(x in year_str for x in keywords):
+            return current_year + offset
 
     return None
 
@@ -314,7 +357,8 @@ def update_event_attendance_count(conn, event_id):
     Update the attendance count for an event in the events table.
 
     Counts all attendance records where checked_in = TRUE for the given event
-    and updates the events.attendance field with this count.
+    and updates the events.attendance field with this count, in one
+    statement. The caller commits.
 
     Args:
         conn: Database connection
@@ -325,24 +369,61 @@ def update_event_attendance_count(conn, event_id):
     """
     cursor = conn.cursor()
     try:
-        # Count checked-in attendees
         cursor.execute("""
-            SELECT COUNT(*)
-            FROM attendance
-            WHERE event_id = %s AND checked_in = TRUE
+            UPDATE events
+            SET attendance = (
+                SELECT COUNT(*)
+                FROM attendance
+                WHERE event_id = events.id AND checked_in = TRUE
+            )
+            WHERE id = %s
+            RETURNING attendance
         """, (event_id,))
 
-        count = cursor.fetchone()[0]
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    finally:
+        cursor.close()
 
-        # Update events table
+
+def update_first_event_flags(conn, event_id):
+    """
+    Recompute is_first_event for everyone who checked in to an event.
+
+    Each such person's earliest checked-in event is flagged TRUE and all of
+    their other attendance rows FALSE, in one statement for the whole event.
+    The caller commits.
+
+    Args:
+        conn: Database connection
+        event_id: ID of the event whose attendees should be updated
+
+    Returns:
+        count: Number of attendance records changed
+    """
+    cursor = conn.cursor()
+    try:
         cursor.execute("""
-            UPDATE events
-            SET attendance = %s
-            WHERE id = %s
-        """, (count, event_id))
+            WITH firsts AS (
+                SELECT DISTINCT ON (a.person_id) a.person_id, a.event_id
+                FROM attendance a
+                JOIN events e ON a.event_id = e.id
+                WHERE a.checked_in = TRUE
+                  AND a.person_id IN (
+                      SELECT person_id
+                      FROM attendance
+                      WHERE event_id = %s AND checked_in = TRUE
+                  )
+                ORDER BY a.person_id, e.start_datetime ASC
+            )
+            UPDATE attendance a
+            SET is_first_event = (a.event_id = f.event_id)
+            FROM firsts f
+            WHERE a.person_id = f.person_id
+              AND a.is_first_event IS DISTINCT FROM (a.event_id = f.event_id)
+        """, (event_id,))
 
-        conn.commit()
-        return count
+        return cursor.rowcount
     finally:
         cursor.close()
 
@@ -353,7 +434,7 @@ def update_person_attendance_counts(conn, event_id):
 
     For each person who has an attendance record for the given event,
     recalculates their total checked-in attendance count and updates
-    the people.event_attendance_count field.
+    the people.event_attendance_count field. The caller commits.
 
     Args:
         conn: Database connection
@@ -365,24 +446,28 @@ def update_person_attendance_counts(conn, event_id):
     cursor = conn.cursor()
     try:
         # Update event_attendance_count for all people who have an attendance
-        # record for this event (whether checked in or not, to handle updates)
+        # record for this event (whether checked in or not, to handle updates).
+        # Their counts come from one grouped pass over attendance rather than
+        # a correlated COUNT(*) per person; unchanged counts are left alone
         cursor.execute("""
-            UPDATE people
-            SET event_attendance_count = (
-                SELECT COUNT(*)
-                FROM attendance
-                WHERE person_id = people.id
-                  AND checked_in = TRUE
-            )
-            WHERE id IN (
-                SELECT DISTINCT person_id
+            WITH counts AS (
+                SELECT person_id, COUNT(*) FILTER (WHERE checked_in) AS attended
                 FROM attendance
-                WHERE event_id = %s
+                WHERE person_id IN (
+                    SELECT person_id
+                    FROM attendance
+                    WHERE event_id = %s
+                )
+                GROUP BY person_id
             )
+            UPDATE people
+            SET event_attendance_count = counts.attended
+            FROM counts
+            WHERE people.id = counts.person_id
+              AND people.event_attendance_count IS DISTINCT FROM counts.attended
         """, (event_id,))
 
         rows_updated = cursor.rowcount
-        conn.commit()
 
         logging.info(f"Updated event_attendance_count for {rows_updated} people")
         return rows_updated
@@ -390,72 +475,55 @@ def update_person_attendance_counts(conn, event_id):
         cursor.close()
 
 
-def update_names_if_substring(conn, person_id, sheet_first, sheet_last, input_first, input_last):
+def update_names_if_substring(sheet_first, sheet_last, input_first, input_last):
     """
-    Update person's name in database to the longer/more complete version.
+    Pick the longer/more complete version of a person's name.
 
-    If one name is a substring of another (e.g., "Ben" vs "Benjamin"), this function
-    updates the database to use the longer, more complete version. This helps maintain
-    data quality by preferring full names over nicknames or abbreviated versions.
+    If one name is a substring of another (e.g., "Ben" vs "Benjamin"), the longer,
+    more complete version wins. This helps maintain data quality by preferring full
+    names over nicknames or abbreviated versions. The caller stages the result; no
+    database write happens here.
 
     Args:
-        conn: Database connection
-        person_id: ID of the person to update
         sheet_first: First name from database
         sheet_last: Last name from database
         input_first: First name from current input
         input_last: Last name from current input
 
     Returns:
-        None
+        dict: The name columns whose value changes (empty if none)
     """
     if not sheet_first:
         sheet_first = ""
     if not input_first:
         input_first = ""
 
+    # Common case: the guest's name matches what we already have
+    if sheet_first.lower() == input_first.lower() and (sheet_last or "").lower() == (input_last or "").lower():
+        return {}
+
     updates = {}
 
     if sheet_first.lower() in input_first.lower() or input_first.lower() in sheet_first.lower():
         longer_first = max(sheet_first, input_first, key=len)
-        updates['first_name'] = longer_first
+        if longer_first != sheet_first:
+            updates['first_name'] = longer_first
 
     if sheet_last and input_last:
         if sheet_last.lower() in input_last.lower() or input_last.lower() in sheet_last.lower():
             longer_last = max(sheet_last, input_last, key=len)
-            updates['last_name'] = longer_last
-
-    if updates:
-        cursor = conn.cursor()
-        try:
-            # Use explicit column names for security instead of dynamic SQL
-            set_parts = []
-            values = []
-            for key, value in updates.items():
-                if key in ['first_name', 'last_name']:  # Whitelist allowed columns
-                    set_parts.append(f"{key} = %s")
-                    values.append(value)
-
-            if set_parts:
-                set_clause = ', '.join(set_parts)
-                values.append(person_id)
-                cursor.execute(f"UPDATE people SET {set_clause} WHERE id = %s", values)
-                conn.commit()
-        finally:
-            cursor.close()
-
+            if longer_last != sheet_last:
+                updates['last_name'] = longer_last
 
-def fuzzy_ratio(str_a, str_b):
-    """Calculate fuzzy string similarity ratio using SequenceMatcher"""
-    return SequenceMatcher(None, str_a, str_b).ratio()
+    return updates
 
 
-def match_tracking_link_to_person(conn, link_value, fuzzy_threshold=0.8):
+def match_tracking_link_to_person(people_index, link_value, fuzzy_threshold=0.8):
     """
     Match a tracking link value to a person in the database using fuzzy matching.
 
     Args:
-        conn: Database connection
+        people_index: In-memory people index (see load_people_index)
         link_value: The tracking link string (e.g., "doron", "[name]", "admlzr")
         fuzzy_threshold: Fuzzy matching threshold (default 0.8)
 
@@ -469,12 +537,7 @@ def match_tracking_link_to_person(conn, link_value, fuzzy_threshold=0.8):
     link_value = str(link_value).strip().lower()
 
     # Skip generic tracking codes that don't represent personal referrals
-    generic_codes = {
-        'default', 'emailreferral', 'email_first_button',
-        'email_second_button', 'email', 'txt', 'insta',
-        'maillist', 'lastname', '[name]'
-    }
-    if link_value in generic_codes:
+    if link_value in GENERIC_REFERRAL_CODES:
         return None
 
     # Determine if this is a single word (no underscores or hyphens)
@@ -484,85 +547,207 @@ def match_tracking_link_to_person(conn, link_value, fuzzy_threshold=0.8):
     # Remove common prefixes/suffixes
     clean_name = link_value.replace('_', ' ').replace('-', ' ').strip()
 
-    # Get all people from database
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-    try:
-        cursor.execute("SELECT id, first_name, last_name FROM people")
-        all_people = cursor.fetchall()
-    finally:
-        cursor.close()
+    # Match on first name (and last name only if multi-word), scoring every
+    # person at once. An exact match scores 100, and argmax takes the first
+    # person with the best score, so exact matches still win in index order.
+    # The best match is memoized per link (see update_fuzzy_match_cache).
+    key = (clean_name, is_single_word)
+    cached = people_index['link_matches'].get(key)
+    if cached is None:
+        cached = (None, -1.0)
+
+        # Exact matches are a hash lookup; only a miss is scored
+        exact = [exact_name_position(people_index, 'first_names', clean_name)]
+        if not is_single_word:
+            exact.append(exact_name_position(people_index, 'last_names', clean_name))
+        exact = [position for position in exact if position is not None]
+
+        if exact:
+            cached = (min(exact), 100.0)
+        elif people_index['ids']:
+            ratios = process.cdist([clean_name], people_index['first_names'], scorer=fuzz.ratio)[0]
+            if not is_single_word:
+                last_ratios = process.cdist([clean_name], people_index['last_names'], scorer=fuzz.ratio)[0]
+                ratios = np.maximum(ratios, last_ratios)
+
+            best = int(ratios.argmax())
+            cached = (best, float(ratios[best]))
+        people_index['link_matches'][key] = cached
+
+    best, best_ratio = cached
+    if best is not None and best_ratio / 100 >= fuzzy_threshold:
+        return people_index['ids'][best]
 
-    # Try exact match on first name (and last name only if multi-word)
-    for person in all_people:
-        first = person['first_name'].lower() if person['first_name'] else ''
-        last = person['last_name'].lower() if person['last_name'] else ''
+    return None
 
-        # Always check first name
-        if clean_name == first:
-            return person['id']
 
-        # Only check last name if this is a multi-word tracking link
-        if not is_single_word and clean_name == last:
-            return person['id']
+def load_people_index(conn):
+    """
+    Load the people table once into in-memory lookup dicts, so matching a
+    guest never needs a query of its own.
 
-    # Try fuzzy matching on first name (and last name only if multi-word)
-    best_match = None
-    best_ratio = 0
+    Args:
+        conn: Database connection
 
-    for person in all_people:
-        first = person['first_name'].lower() if person['first_name'] else ''
-        last = person['last_name'].lower() if person['last_name'] else ''
+    Returns:
+        dict: {'people': id -> person dict, 'email': lowercased email -> id,
+        'phone': phone -> id, 'name': (first, last) lowercased -> list of ids},
+        plus parallel 'ids', 'first_names' and 'last_names' lists (lowercased
+        names, for batch fuzzy scoring), 'position' (id -> list position),
+        'first_names_at' and 'last_names_at' (lowercased name -> earliest
+        list position, for exact matches) and the memoized fuzzy matches,
+        'name_matches' and 'link_matches' (query -> (best position, best score))
+    """
+    people_index = {
+        'people': {}, 'email': {}, 'phone': {}, 'name': {},
+        'ids': [], 'first_names': [], 'last_names': [], 'position': {},
+        'first_names_at': {}, 'last_names_at': {},
+        'name_matches': {}, 'link_matches': {},
+    }
 
-        # Check fuzzy match against first name
-        if first:
-            ratio = fuzzy_ratio(clean_name, first)
-            if ratio >= fuzzy_threshold and ratio > best_ratio:
-                best_ratio = ratio
-                best_match = person['id']
+    # Server-side cursor so the table is streamed rather than held twice
+    cursor = conn.cursor(name='people_index')
+    cursor.itersize = PEOPLE_INDEX_ITERSIZE
+    try:
+        cursor.execute("""
+            SELECT id, first_name, last_name, school_email, personal_email, phone_number
+            FROM people
+            ORDER BY id
+        """)
+        for person_id, first_name, last_name, school_email, personal_email, phone in cursor:
+            index_person(people_index, person_id, first_name, last_name, school_email, personal_email, phone)
+    finally:
+        cursor.close()
 
-        # Check fuzzy match against last name only if multi-word
-        if not is_single_word and last:
-            ratio = fuzzy_ratio(clean_name, last)
-            if ratio >= fuzzy_threshold and ratio > best_ratio:
-                best_ratio = ratio
-                best_match = person['id']
+    logging.info(f"Loaded {len(people_index['people'])} people into the match index")
+    return people_index
 
-    return best_match
+
+def index_person(people_index, person_id, first_name, last_name,
+                 school_email=None, personal_email=None, phone=None):
+    """
+    Add a person to the people index, or refresh their entry after a write.
+
+    Earlier (lower) IDs keep an email or phone number if it is shared.
+    """
+    previous = people_index['people'].get(person_id)
+    if previous and previous['first_name'] and previous['last_name']:
+        old_key = (previous['first_name'].lower(), previous['last_name'].lower())
+        if old_key in people_index['name'] and person_id in people_index['name'][old_key]:
+            people_index['name'][old_key].remove(person_id)
+
+    people_index['people'][person_id] = {
+        'id': person_id,
+        'first_name': first_name,
+        'last_name': last_name,
+        'school_email': school_email,
+        'personal_email': personal_email,
+        'phone_number': phone,
+    }
+
+    for email in (school_email, personal_email):
+        if email:
+            people_index['email'].setdefault(email.lower(), person_id)
+    if phone:
+        people_index['phone'].setdefault(phone, person_id)
+    if first_name and last_name:
+        people_index['name'].setdefault((first_name.lower(), last_name.lower()), []).append(person_id)
+
+    first_lower, last_lower = (first_name or '').lower(), (last_name or '').lower()
+    position = people_index['position'].get(person_id)
+    if position is None:
+        position = len(people_index['ids'])
+        people_index['position'][person_id] = position
+        people_index['ids'].append(person_id)
+        people_index['first_names'].append(first_lower)
+        people_index['last_names'].append(last_lower)
+        people_index['first_names_at'].setdefault(first_lower, position)
+        people_index['last_names_at'].setdefault(last_lower, position)
+        update_fuzzy_match_cache(people_index, position)
+    elif (people_index['first_names'][position], people_index['last_names'][position]) != (first_lower, last_lower):
+        people_index['first_names'][position] = first_lower
+        people_index['last_names'][position] = last_lower
+        for names_at, name in (('first_names_at', first_lower), ('last_names_at', last_lower)):
+            people_index[names_at][name] = min(people_index[names_at].get(name, position), position)
+        # A rename can lower a cached best score; rescore from scratch
+        people_index['name_matches'].clear()
+        people_index['link_matches'].clear()
+
+
+def exact_name_position(people_index, names, name):
+    """
+    Return the earliest list position whose lowercased first or last name
+    (names is 'first_names' or 'last_names') is exactly name, or None.
+    """
+    position = people_index[f'{names}_at'].get(name)
+    # A rename can leave an entry pointing at someone no longer called name
+    if position is not None and people_index[names][position] == name:
+        return position
+    if position is not None:
+        return next((i for i, other in enumerate(people_index[names]) if other == name), None)
+    return None
 
 
-def find_person_by_email(cursor, email):
+def update_fuzzy_match_cache(people_index, position):
+    """
+    Fold a newly indexed person into the memoized fuzzy matches, so the
+    cached best matches stay correct without rescanning everyone.
+    """
+    first, last = people_index['first_names'][position], people_index['last_names'][position]
+
+    name_matches = people_index['name_matches']
+    for (query_first, query_last), (_, best_ratio) in name_matches.items():
+        ratio = (fuzz.ratio(query_first, first) + fuzz.ratio(query_last, last)) / 2
+        # Strictly greater: an earlier person keeps a tie, as with argmax
+        if ratio > best_ratio:
+            name_matches[(query_first, query_last)] = (position, ratio)
+
+    link_matches = people_index['link_matches']
+    for (clean_name, is_single_word), (_, best_ratio) in link_matches.items():
+        ratio = fuzz.ratio(clean_name, first)
+        if not is_single_word:
+            ratio = max(ratio, fuzz.ratio(clean_name, last))
+        if ratio > best_ratio:
+            link_matches[(clean_name, is_single_word)] = (position, ratio)
+
+
+def reindex_person(people_index, old_id, new_id):
+    """Move a person in the people index from a provisional ID to their real one."""
+    person = people_index['people'].pop(old_id)
+    person['id'] = new_id
+    people_index['people'][new_id] = person
+
+    for email in (person['school_email'], person['personal_email']):
+        if email and people_index['email'].get(email.lower()) == old_id:
+            people_index['email'][email.lower()] = new_id
+    if person['phone_number'] and people_index['phone'].get(person['phone_number']) == old_id:
+        people_index['phone'][person['phone_number']] = new_id
+    if person['first_name'] and person['last_name']:
+        ids = people_index['name'][(person['first_name'].lower(), person['last_name'].lower())]
+        ids[ids.index(old_id)] = new_id
+
+    position = people_index['position'].pop(old_id)
+    people_index['position'][new_id] = position
+    people_index['ids'][position] = new_id
+
+
+def find_person_by_email(people_index, email):
     """Find person by email (school or personal)"""
     if not email:
         return None
 
-    email = email.lower().strip()
-
-    cursor.execute("""
-        SELECT id FROM people
-        WHERE LOWER(school_email) = %s OR LOWER(personal_email) = %s
-    """, (email, email))
+    return people_index['email'].get(email.lower().strip())
 
-    result = cursor.fetchone()
-    return result[0] if result else None
 
-
-def find_person_by_phone(cursor, phone):
+def find_person_by_phone(people_index, phone):
     """Find person by phone number"""
     if not phone:
         return None
 
-    phone = str(phone).strip()
-
-    cursor.execute("""
-        SELECT id FROM people
-        WHERE phone_number = %s
-    """, (phone,))
-
-    result = cursor.fetchone()
-    return result[0] if result else None
+    return people_index['phone'].get(str(phone).strip())
 
 
-def find_person_by_name(cursor, first_name, last_name):
+def find_person_by_name(people_index, first_name, last_name):
     """Find person by exact name match"""
     if not first_name or not last_name:
         return None
@@ -570,25 +755,17 @@ def find_person_by_name(cursor, first_name, last_name):
     first_name = str(first_name).strip().title()
     last_name = str(last_name).strip().title()
 
-    cursor.execute("""
-        SELECT id FROM people
-        WHERE LOWER(first_name) = LOWER(%s)
-        AND LOWER(last_name) = LOWER(%s)
-    """, (first_name, last_name))
-
-    results = cursor.fetchall()
+    results = people_index['name'].get((first_name.lower(), last_name.lower()))
 
-    if len(results) == 1:
-        return results[0][0]
-    elif len(results) > 1:
+    if not results:
+        return None
+    if len(results) > 1:
         # Multiple matches - for automated import, use first one
         logging.warning(f"Multiple matches for {first_name} {last_name}, using first match")
-        return results[0][0]
-
-    return None
+    return results[0]
 
 
-def fuzzy_match_name(cursor, first_name, last_name):
+def fuzzy_match_name(people_index, first_name, last_name):
     """
     Fuzzy match person by name similarity
     From raw_csv_to_sql.py logic
@@ -599,78 +776,73 @@ def fuzzy_match_name(cursor, first_name, last_name):
     first_name = str(first_name).strip().title()
     last_name = str(last_name).strip().title()
 
-    # Load all people for fuzzy matching
-    cursor.execute("""
-        SELECT id, first_name, last_name FROM people
-    """)
-
-    all_people = cursor.fetchall()
-    matches = []
-
-    for person_id, db_first, db_last in all_people:
-        # Calculate similarity ratio
-        first_ratio = SequenceMatcher(None, first_name.lower(), db_first.lower()).ratio()
-        last_ratio = SequenceMatcher(None, last_name.lower(), db_last.lower()).ratio()
-
-        # Average ratio
-        avg_ratio = (first_ratio + last_ratio) / 2
-
-        if avg_ratio >= FUZZY_MATCH_THRESHOLD:
-            matches.append((person_id, avg_ratio, db_first, db_last))
-
-    if matches:
-        # Sort by ratio descending
-        matches.sort(key=lambda x: x[1], reverse=True)
-        best_match = matches[0]
-
-        if best_match[1] >= 0.90:  # High confidence
-            logging.info(f"Fuzzy matched {first_name} {last_name} to {best_match[2]} {best_match[3]} (confidence: {best_match[1]:.2f})")
-            return best_match[0]
+    # The best match is memoized per name (see update_fuzzy_match_cache)
+    key = (first_name.lower(), last_name.lower())
+    cached = people_index['name_matches'].get(key)
+    if cached is None:
+        cached = (None, -1.0)
+
+        # Exact matches are a hash lookup; only a miss is scored
+        exact = people_index['name'].get(key)
+        if exact:
+            cached = (min(people_index['position'][person_id] for person_id in exact), 100.0)
+        elif people_index['ids']:
+            # Score every person at once (0-100), then average first and last
+            # name. A match needs an average of 90, so each name must score
+            # at least 80; scores under that are cut to 0, which lets rapidfuzz
+            # skip most comparisons and leaves any 90+ average exact
+            first_ratios = process.cdist([key[0]], people_index['first_names'], scorer=fuzz.ratio, score_cutoff=80)[0]
+            last_ratios = process.cdist([key[1]], people_index['last_names'], scorer=fuzz.ratio, score_cutoff=80)[0]
+            avg_ratios = (first_ratios + last_ratios) / 2
+
+            # argmax takes the first person with the best score
+            best = int(avg_ratios.argmax())
+            cached = (best, float(avg_ratios[best]))
+        people_index['name_matches'][key] = cached
+
+    best, best_ratio = cached
+    best_ratio /= 100
+
+    if best is not None and best_ratio >= FUZZY_MATCH_THRESHOLD and best_ratio >= 0.90:  # High confidence
+        best_match = people_index['people'][people_index['ids'][best]]
+        logging.info(f"Fuzzy matched {first_name} {last_name} to {best_match['first_name']} {best_match['last_name']} (confidence: {best_ratio:.2f})")
+        return best_match['id']
 
     return None
 
 
-def create_person(cursor, row_data):
+def create_person(batch, row_data):
     """
-    Create a new person record
+    Stage a new person record (inserted when the batch is flushed)
     Args:
-        cursor: Database cursor
+        batch: ImportBatch to stage the person in
         row_data: Dictionary with person data
-    Returns: person_id
+    Returns: provisional person_id (negative until the batch is flushed)
     """
     # additional_info is intentionally not written to people. Registration
     # answers are per-event snapshots and live on attendance.additional_info
     # so cross-event aggregation can use the answer each person gave at the
     # time of each registration, not just their most-recent answer.
-    cursor.execute("""
-        INSERT INTO people (
-            first_name,
-            last_name,
-            gender,
-            class_year,
-            school,
-            preferred_name
-        ) VALUES (%s, %s, %s, %s, %s, NULL)
-        RETURNING id
-    """, (
-        row_data['first_name'],
-        row_data['last_name'],
-        row_data['gender'],
-        row_data['class_year'],
-        row_data['school'],
-    ))
-
-    person_id = cursor.fetchone()[0]
-    logging.info(f"Created new person: {row_data['first_name']} {row_data['last_name']} (ID: {person_id})")
+    person_id = batch.next_provisional_id
+    batch.next_provisional_id -= 1
+
+    batch.new_people[person_id] = (row_data['gender'], row_data['class_year'], row_data['school'])
+    index_person(
+        batch.people_index, person_id, row_data['first_name'], row_data['last_name'],
+        row_data['school_email'], row_data['personal_email'], row_data['phone']
+    )
     return person_id
 
 
-def update_contact_info(cursor, person_id, row_data):
+def update_contact_info(batch, person_id, row_data):
     """
     Update person's contact information using COALESCE pattern
     Only updates fields that are currently NULL
     From raw_csv_to_sql.py logic
 
+    The current values come from the people index, and the person is only
+    staged for the batch's contact UPDATE when a NULL field is being filled.
+
     Note: additional_info is no longer written to people. Per-event
     registration answers are stored on attendance.additional_info instead,
     so historical Event X answers are preserved when the same person
@@ -683,30 +855,18 @@ def update_contact_info(cursor, person_id, row_data):
     personal_email = row_data.get('personal_email')
     phone = row_data.get('phone')
 
-    # Check current values before update
-    cursor.execute("""
-        SELECT school_email, personal_email, phone_number
-        FROM people
-        WHERE id = %s
-    """, (person_id,))
-    current = cursor.fetchone()
+    # Current values from the index
+    people_index = batch.people_index
+    current = people_index['people'].get(person_id)
 
     if not current:
         return False
 
-    current_school_email, current_personal_email, current_phone = current
+    current_school_email = current['school_email']
+    current_personal_email = current['personal_email']
+    current_phone = current['phone_number']
 
-    # Update contact info
-    cursor.execute("""
-        UPDATE people
-        SET
-            school_email = COALESCE(school_email, %s),
-            personal_email = COALESCE(personal_email, %s),
-            phone_number = COALESCE(phone_number, %s)
-        WHERE id = %s
-    """, (school_email, personal_email, phone, person_id))
-
-    # Check if any field was updated (was NULL and now has a value)
+    # Check if any field will be updated (is NULL and now has a value)
     updated = False
     if current_school_email is None and school_email is not None:
         updated = True
@@ -715,26 +875,39 @@ def update_contact_info(cursor, person_id, row_data):
     if current_phone is None and phone is not None:
         updated = True
 
-    return updated
+    if not updated:
+        return False
+
+    # Stage the update (people still to be inserted pick it up from the index)
+    if person_id not in batch.new_people:
+        batch.contact_updates.add(person_id)
+
+    index_person(
+        people_index, person_id, current['first_name'], current['last_name'],
+        current_school_email if current_school_email is not None else school_email,
+        current_personal_email if current_personal_email is not None else personal_email,
+        current_phone if current_phone is not None else phone
+    )
 
+    return True
 
-def find_or_create_person(conn, cursor, guest_data):
+
+def find_or_create_person(batch, guest):
     """
     Find existing person or create new one
     Multi-strategy matching: email -> phone -> exact name -> fuzzy name -> create
     From raw_csv_to_sql.py logic
 
     Args:
-        conn: Database connection (needed for update_names_if_substring)
-        cursor: Database cursor
-        guest_data: Guest data dictionary from JSON
+        batch: ImportBatch that new people, contact and name updates are
+            staged in; its people index is kept up to date with them
+        guest: Guest fields from extract_guest_fields
     """
-    # Extract data from guest_data using JSON field mappings
-    first_name = na_to_none(guest_data.get(JSON_FIELD_MAPPING['first_name']))
-    last_name = na_to_none(guest_data.get(JSON_FIELD_MAPPING['last_name']))
-    full_name = na_to_none(guest_data.get(JSON_FIELD_MAPPING.get('name')))
-    email = na_to_none(guest_data.get(JSON_FIELD_MAPPING['email']))
-    phone = na_to_none(guest_data.get(JSON_FIELD_MAPPING.get('phone')))
+    first_name = guest['first_name']
+    last_name = guest['last_name']
+    full_name = guest['name']
+    email = guest['email']
+    phone = guest['phone']
 
     # If first_name and last_name are blank, try splitting the full name
     if not first_name and not last_name and full_name:
@@ -742,21 +915,13 @@ def find_or_create_person(conn, cursor, guest_data):
         logging.info(f"Split name '{full_name}' into first='{first_name}' last='{last_name}'")
 
     # Extract school email from registration_answers (prioritize this over main email)
-    school_email_from_reg = get_registration_answer(guest_data, 'School email (.edu)')
-
-    # Extract custom fields from registration_answers
-    gender_raw = get_registration_answer(guest_data, 'Gender')
-    school_raw = get_registration_answer(guest_data, 'School')
-    if not school_raw:
-        # Try alternate question labels
-        school_raw = get_registration_answer(guest_data, 'What school do you go to?')
-
-    year_raw = get_registration_answer(guest_data, 'Grad year')
-    if not year_raw:
-        # Try alternate question labels
-        year_raw = get_registration_answer(guest_data, 'Graduation Year')
-        if not year_raw:
-            year_raw = get_registration_answer(guest_data, 'Class Year')
+    school_email_from_reg = get_registration_answer(guest, 'School email (.edu)')
+
+    # Extract custom fields from registration_answers (falling back to
+    # alternate question labels)
+    gender_raw = get_registration_answer(guest, 'Gender')
+    school_raw = get_registration_answer(guest, 'School', 'What school do you go to?')
+    year_raw = get_registration_answer(guest, 'Grad year', 'Graduation Year', 'Class Year')
 
     # Skip guests with no name data - database requires NOT NULL for names
     if not first_name and not last_name:
@@ -797,7 +962,7 @@ def find_or_create_person(conn, cursor, guest_data):
     class_year = normalize_class_year(year_raw)
 
     # Extract all registration answers for storage in additional_info
-    additional_info = get_all_registration_answers(guest_data)
+    additional_info = guest['additional_info']
 
     # Prepare row data
     row_data = {
@@ -813,53 +978,64 @@ def find_or_create_person(conn, cursor, guest_data):
     }
 
     # Try matching strategies in order
+    people_index = batch.people_index
     person_id = None
     was_created = False
 
     # 1. Try email match (prioritize school email)
     if school_email_final:
-        person_id = find_person_by_email(cursor, school_email_final)
+        person_id = find_person_by_email(people_index, school_email_final)
     if not person_id and personal_email_final:
-        person_id = find_person_by_email(cursor, personal_email_final)
+        person_id = find_person_by_email(people_index, personal_email_final)
 
     # 2. Try phone match
     if not person_id and phone:
-        person_id = find_person_by_phone(cursor, phone)
+        person_id = find_person_by_phone(people_index, phone)
 
     # 3. Try exact name match
     if not person_id and first_name and last_name:
-        person_id = find_person_by_name(cursor, first_name, last_name)
+        person_id = find_person_by_name(people_index, first_name, last_name)
 
     # 4. Try fuzzy name match
     if not person_id and first_name and last_name:
-        person_id = fuzzy_match_name(cursor, first_name, last_name)
+        person_id = fuzzy_match_name(people_index, first_name, last_name)
 
-    # 5. Create new person if no match
+    # 5. Create new person if no match (inserted with their contact info)
     if not person_id:
-        person_id = create_person(cursor, row_data)
+        person_id = create_person(batch, row_data)
         was_created = True
-
-    # Update contact info regardless (COALESCE will preserve existing)
-    contact_updated = update_contact_info(cursor, person_id, row_data)
+        contact_updated = any(row_data[field] is not None for field in ('school_email', 'personal_email', 'phone'))
+    else:
+        # Update contact info (COALESCE will preserve existing)
+        contact_updated = update_contact_info(batch, person_id, row_data)
 
     # Update names if substring (only for existing persons, not newly created)
     if not was_created and person_id and first_name and last_name:
-        # Fetch existing person's name from database
-        cursor.execute("""
-            SELECT first_name, last_name FROM people WHERE id = %s
-        """, (person_id,))
-        result = cursor.fetchone()
-        if result:
-            db_first_name, db_last_name = result
-            update_names_if_substring(conn, person_id, db_first_name, db_last_name, first_name, last_name)
+        # Existing person's name from the index
+        person = people_index['people'].get(person_id)
+        if person:
+            db_first_name, db_last_name = person['first_name'], person['last_name']
+            updates = update_names_if_substring(db_first_name, db_last_name, first_name, last_name)
+            if updates:
+                # People created in this batch are inserted with the new name
+                if person_id not in batch.new_people:
+                    batch.name_updates.add(person_id)
+                index_person(
+                    people_index, person_id,
+                    updates.get('first_name', db_first_name), updates.get('last_name', db_last_name),
+                    person['school_email'], person['personal_email'], person['phone_number']
+                )
 
     return person_id, was_created, contact_updated
 
 
-def find_or_create_invite_token(cursor, event_id, tracking_link):
+def normalize_invite_token(tracking_link):
     """
-    Find or create invite token
+    Normalize a tracking link to the invite token value and category stored for it
     From raw_csv_to_sql.py logic
+
+    Returns:
+        tuple: (value, category)
     """
     if not tracking_link:
         tracking_link = 'default'
@@ -867,47 +1043,292 @@ def find_or_create_invite_token(cursor, event_id, tracking_link):
     tracking_link = str(tracking_link).strip()[:100]  # Respect VARCHAR(100) limit
 
     # Skip generic codes
-    generic_codes = ['default', 'emailreferral', 'email', 'instagram', 'facebook']
-    if tracking_link.lower() in generic_codes:
-        tracking_link = 'default'
-        category = 'mailing list'
-    else:
-        category = 'personal outreach'
+    if tracking_link.lower() in GENERIC_INVITE_CODES:
+        return 'default', 'mailing list'
+    return tracking_link, 'personal outreach'
 
-    # Check if token exists for this event
+
+def find_or_create_invite_tokens(cursor, event_id, tokens, token_ids):
+    """
+    Find or create a set of invite tokens for an event in at most two statements
+
+    Args:
+        cursor: Database cursor
+        event_id: Event the tokens belong to
+        tokens: Iterable of (value, category) tuples from normalize_invite_token
+        token_ids: Dict of value -> token ID already known for this event;
+            the newly found and created tokens are added to it
+    """
+    missing = {value: category for value, category in tokens if value not in token_ids}
+    if not missing:
+        return
+
+    # Check which tokens exist for this event
     cursor.execute("""
-        SELECT id FROM invitetokens
-        WHERE event_id = %s AND value = %s
-    """, (event_id, tracking_link))
+        SELECT id, value FROM invitetokens
+        WHERE event_id = %s AND value = ANY(%s)
+    """, (event_id, list(missing)))
+
+    for token_id, value in cursor.fetchall():
+        token_ids.setdefault(value, token_id)
 
-    result = cursor.fetchone()
-    if result:
-        return result[0]
+    # Create the rest
+    new_tokens = [(event_id, category, value) for value, category in missing.items() if value not in token_ids]
+    if new_tokens:
+        created = execute_values(cursor, """
+            INSERT INTO invitetokens (event_id, category, value)
+            VALUES %s
+            RETURNING id, value
+        """, new_tokens, page_size=len(new_tokens), fetch=True)
 
-    # Create new token
+        for token_id, value in created:
+            token_ids[value] = token_id
+
+
+def create_attendance_staging(cursor):
+    """
+    Create this session's attendance staging table (the COPY target for a
+    flushed batch; emptied after each batch is copied out, and on commit).
+
+    rsvp_datetime is staged as TIMESTAMPTZ so the Luma offset is converted
+    when it is copied into attendance, as a bound parameter would be.
+    """
     cursor.execute("""
-        INSERT INTO invitetokens (event_id, category, value)
-        VALUES (%s, %s, %s)
-        RETURNING id
-    """, (event_id, category, tracking_link))
+        CREATE TEMP TABLE IF NOT EXISTS attendance_stage (
+            person_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            rsvp BOOLEAN NOT NULL,
+            approved BOOLEAN NOT NULL,
+            checked_in BOOLEAN NOT NULL,
+            rsvp_datetime TIMESTAMPTZ,
+            invite_token_id INTEGER NOT NULL,
+            additional_info JSONB
+        ) ON COMMIT DELETE ROWS
+    """)
 
-    token_id = cursor.fetchone()[0]
-    return token_id
 
+def encode_copy_rows(rows):
+    """
+    Encode rows as a COPY ... (FORMAT csv) buffer (None -> NULL).
 
-def create_attendance_record(cursor, person_id, event_id, guest_data):
+    An empty string would also be read back as NULL; the importer never
+    stages one (blank guest fields become None in na_to_none).
+    """
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    return buf
+
+
+class ImportBatch:
+    """
+    One event's guest writes, staged in memory and sent a batch at a time.
+
+    New people get provisional (negative) IDs so later guests, attendance
+    rows and referrals can refer to them; flush() swaps in real IDs from the
+    people sequence and then writes people and attendance (both streamed in
+    with COPY), contact and name updates, invite tokens and referral counts
+    with one statement each.
+    """
+
+    def __init__(self, event_id, people_index):
+        self.event_id = event_id
+        self.people_index = people_index
+        self.next_provisional_id = -1
+        self.new_people = {}          # provisional id -> (gender, class_year, school)
+        self.contact_updates = set()  # existing people with contact info to fill
+        self.name_updates = set()     # existing people with a longer name
+        self.attendance = {}          # person id -> staged attendance fields
+        self.referrals = Counter()    # referrer id -> referrals to add
+        self.token_ids = {}           # invite token value -> id, for this event
+        self.staging_conn = None      # connection attendance_stage was created on
+
+    def assign_person_ids(self, cursor):
+        """Replace the staged people's provisional IDs with real ones."""
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence('people', 'id')) FROM generate_series(1, %s)",
+            (len(self.new_people),)
+        )
+        real_ids = dict(zip(self.new_people, (row[0] for row in cursor.fetchall())))
+
+        for provisional_id, person_id in real_ids.items():
+            reindex_person(self.people_index, provisional_id, person_id)
+
+        def real(person_id):
+            return real_ids.get(person_id, person_id)
+
+        self.new_people = {real(pid): fields for pid, fields in self.new_people.items()}
+        self.attendance = {real(pid): fields for pid, fields in self.attendance.items()}
+        self.referrals = Counter({real(pid): count for pid, count in self.referrals.items()})
+
+    def flush(self, cursor):
+        """Write everything staged so far and start a new batch (the caller commits once the event is done)."""
+        people = self.people_index['people']
+
+        # 1. New people (their IDs are reserved, so they can be COPYed in)
+        if self.new_people:
+            self.assign_person_ids(cursor)
+            cursor.copy_expert("""
+                COPY people (
+                    id,
+                    first_name,
+                    last_name,
+                    gender,
+                    class_year,
+                    school,
+                    school_email,
+                    personal_email,
+                    phone_number
+                ) FROM STDIN WITH (FORMAT csv)
+            """, encode_copy_rows(
+                (
+                    person_id,
+                    people[person_id]['first_name'],
+                    people[person_id]['last_name'],
+                    gender,
+                    class_year,
+                    school,
+                    people[person_id]['school_email'],
+                    people[person_id]['personal_email'],
+                    people[person_id]['phone_number'],
+                )
+                for person_id, (gender, class_year, school) in self.new_people.items()
+            ))
+
+            for person_id in self.new_people:
+                logging.info(f"Created new person: {people[person_id]['first_name']} {people[person_id]['last_name']} (ID: {person_id})")
+
+        # 2. Contact info for existing people (COALESCE preserves existing)
+        if self.contact_updates:
+            execute_values(cursor, """
+                UPDATE people
+                SET
+                    school_email = COALESCE(people.school_email, v.school_email),
+                    personal_email = COALESCE(people.personal_email, v.personal_email),
+                    phone_number = COALESCE(people.phone_number, v.phone_number)
+                FROM (VALUES %s) AS v (id, school_email, personal_email, phone_number)
+                WHERE people.id = v.id
+            """, [
+                (
+                    person_id,
+                    people[person_id]['school_email'],
+                    people[person_id]['personal_email'],
+                    people[person_id]['phone_number'],
+                )
+                for person_id in self.contact_updates
+            ], page_size=len(self.contact_updates))
+
+        # 3. Longer names for existing people (see update_names_if_substring)
+        if self.name_updates:
+            execute_values(cursor, """
+                UPDATE people
+                SET
+                    first_name = v.first_name,
+                    last_name = v.last_name
+                FROM (VALUES %s) AS v (id, first_name, last_name)
+                WHERE people.id = v.id
+            """, [
+                (person_id, people[person_id]['first_name'], people[person_id]['last_name'])
+                for person_id in self.name_updates
+            ], page_size=len(self.name_updates))
+
+        # 4. Invite tokens, then attendance records
+        if self.attendance:
+            find_or_create_invite_tokens(
+                cursor, self.event_id,
+                {(row['token_value'], row['token_category']) for row in self.attendance.values()},
+                self.token_ids
+            )
+
+            # Temp tables are per session; create it on first use of this connection
+            if self.staging_conn is not cursor.connection:
+                create_attendance_staging(cursor)
+                self.staging_conn = cursor.connection
+
+            cursor.copy_expert(
+                "COPY attendance_stage FROM STDIN WITH (FORMAT csv)",
+                encode_copy_rows(
+                    (
+                        person_id,
+                        self.event_id,
+                        row['rsvp'],
+                        row['approved'],
+                        row['checked_in'],
+                        row['rsvp_datetime'],
+                        self.token_ids[row['token_value']],
+                        row['additional_info'],
+                    )
+                    for person_id, row in self.attendance.items()
+                )
+            )
+
+            # ON CONFLICT DO UPDATE allows re-importing to update checked_in and other status changes.
+            # additional_info is COALESCEd so re-imports preserve the original registration snapshot
+            # rather than overwriting it with a (potentially edited) later version.
+            cursor.execute("""
+                INSERT INTO attendance (
+                    person_id,
+                    event_id,
+                    rsvp,
+                    approved,
+                    checked_in,
+                    rsvp_datetime,
+                    is_first_event,
+                    invite_token_id,
+                    additional_info
+                )
+                SELECT
+                    person_id,
+                    event_id,
+                    rsvp,
+                    approved,
+                    checked_in,
+                    rsvp_datetime,
+                    FALSE,
+                    invite_token_id,
+                    additional_info
+                FROM attendance_stage
+                ON CONFLICT (person_id, event_id) DO UPDATE SET
+                    rsvp = EXCLUDED.rsvp,
+                    approved = EXCLUDED.approved,
+                    checked_in = EXCLUDED.checked_in,
+                    rsvp_datetime = EXCLUDED.rsvp_datetime,
+                    invite_token_id = EXCLUDED.invite_token_id,
+                    additional_info = COALESCE(attendance.additional_info, EXCLUDED.additional_info)
+            """)
+
+            # The event is one transaction, so empty the stage for the next batch
+            cursor.execute("TRUNCATE attendance_stage")
+
+        # 5. Referral counts
+        if self.referrals:
+            execute_values(cursor, """
+                UPDATE people
+                SET referral_count = referral_count + v.referrals
+                FROM (VALUES %s) AS v (id, referrals)
+                WHERE people.id = v.id
+            """, list(self.referrals.items()), page_size=len(self.referrals))
+
+        self.new_people = {}
+        self.contact_updates = set()
+        self.name_updates = set()
+        self.attendance = {}
+        self.referrals = Counter()
+
+
+def create_attendance_record(batch, person_id, guest):
     """
-    Create attendance record for person at event
+    Stage attendance record for person at the batch's event
     From raw_csv_to_sql.py logic
 
     Returns:
         tuple: (tracking_link, checked_in) for referral tracking
     """
-    # Parse attendance fields from JSON
-    approved_status = na_to_none(guest_data.get(JSON_FIELD_MAPPING['approved']))
-    checked_in_value = na_to_none(guest_data.get(JSON_FIELD_MAPPING['checked_in']))
-    rsvp_datetime_str = na_to_none(guest_data.get(JSON_FIELD_MAPPING.get('rsvp_datetime')))
-    tracking_link = na_to_none(guest_data.get(JSON_FIELD_MAPPING.get('tracking_link')))
+    # Attendance fields from the guest's JSON
+    approved_status = guest['approved']
+    checked_in_value = guest['checked_in']
+    rsvp_datetime_str = guest['rsvp_datetime']
+    tracking_link = guest['tracking_link']
 
     # Determine rsvp, approved, checked_in booleans
     rsvp = approved_status is not None
@@ -928,75 +1349,26 @@ def create_attendance_record(cursor, person_id, event_id, guest_data):
     # Per-event snapshot of registration answers. Lives on attendance (not
     # people) so each event preserves the answer this person gave at the
     # time of that registration.
-    registration_answers = get_all_registration_answers(guest_data)
+    registration_answers = guest['additional_info']
     additional_info_json = json.dumps(registration_answers) if registration_answers else None
 
-    # Get or create invite token
-    invite_token_id = find_or_create_invite_token(cursor, event_id, tracking_link)
-
-    # Insert or update attendance record
-    # ON CONFLICT DO UPDATE allows re-importing to update checked_in and other status changes.
-    # additional_info is COALESCEd so re-imports preserve the original registration snapshot
-    # rather than overwriting it with a (potentially edited) later version.
-    cursor.execute("""
-        INSERT INTO attendance (
-            person_id,
-            event_id,
-            rsvp,
-            approved,
-            checked_in,
-            rsvp_datetime,
-            is_first_event,
-            invite_token_id,
-            additional_info
-        ) VALUES (%s, %s, %s, %s, %s, %s, FALSE, %s, %s)
-        ON CONFLICT (person_id, event_id) DO UPDATE SET
-            rsvp = EXCLUDED.rsvp,
-            approved = EXCLUDED.approved,
-            checked_in = EXCLUDED.checked_in,
-            rsvp_datetime = EXCLUDED.rsvp_datetime,
-            invite_token_id = EXCLUDED.invite_token_id,
-            additional_info = COALESCE(attendance.additional_info, EXCLUDED.additional_info)
-    """, (
-        person_id,
-        event_id,
-        rsvp,
-        approved,
-        checked_in,
-        rsvp_datetime,
-        invite_token_id,
-        additional_info_json
-    ))
-
-    # Update is_first_event flag if this person checked in
-    if checked_in:
-        # Find the earliest checked-in event for this person
-        cursor.execute("""
-            SELECT a.event_id
-            FROM attendance a
-            JOIN events e ON a.event_id = e.id
-            WHERE a.person_id = %s AND a.checked_in = TRUE
-            ORDER BY e.start_datetime ASC
-            LIMIT 1
-        """, (person_id,))
-        earliest_event = cursor.fetchone()
-
-        if earliest_event:
-            earliest_event_id = earliest_event[0]
-
-            # Set is_first_event = TRUE for earliest event only
-            cursor.execute("""
-                UPDATE attendance
-                SET is_first_event = TRUE
-                WHERE person_id = %s AND event_id = %s
-            """, (person_id, earliest_event_id))
-
-            # Set is_first_event = FALSE for all other events
-            cursor.execute("""
-                UPDATE attendance
-                SET is_first_event = FALSE
-                WHERE person_id = %s AND event_id != %s
-            """, (person_id, earliest_event_id))
+    # Stage the record (its invite token is resolved when the batch is
+    # flushed). A guest listed twice keeps the later status, but the first
+    # registration snapshot, as the ON CONFLICT update would.
+    previous = batch.attendance.get(person_id)
+    if previous and previous['additional_info'] is not None:
+        additional_info_json = previous['additional_info']
+
+    token_value, token_category = normalize_invite_token(tracking_link)
+    batch.attendance[person_id] = {
+        'rsvp': rsvp,
+        'approved': approved,
+        'checked_in': checked_in,
+        'rsvp_datetime': rsvp_datetime,
+        'token_value': token_value,
+        'token_category': token_category,
+        'additional_info': additional_info_json,
+    }
 
     return tracking_link, checked_in
 
@@ -1012,10 +1384,15 @@ def process_event_json(event_id, json_path, event_name, log_people=False):
     """
     logging.info(f"Processing JSON for event: {event_name} (ID: {event_id})")
 
-    conn = get_db_connection()
+    # A pooled connection may have dropped while idle between events
+    conn = ensure_connection(get_db_connection())
     cursor = conn.cursor()
 
     try:
+        # Load every person once; guests are matched against this in memory
+        people_index = load_people_index(conn)
+        batch = ImportBatch(event_id, people_index)
+
         # Read JSON file
         with open(json_path, 'r') as f:
             response_data = json.load(f)
@@ -1041,8 +1418,11 @@ def process_event_json(event_id, json_path, event_name, log_people=False):
                 processed_count += 1
                 continue
 
+            # Read the guest's fields once for matching and attendance
+            guest = extract_guest_fields(guest_data)
+
             # Find or create person
-            person_id, was_created, contact_updated = find_or_create_person(conn, cursor, guest_data)
+            person_id, was_created, contact_updated = find_or_create_person(batch, guest)
 
             # Skip if person couldn't be created (missing required data like name)
             if person_id is None:
@@ -1055,36 +1435,26 @@ def process_event_json(event_id, json_path, event_name, log_people=False):
                 new_contacts_count += 1
 
             # Create attendance record
-            tracking_link, checked_in = create_attendance_record(cursor, person_id, event_id, guest_data)
+            tracking_link, checked_in = create_attendance_record(batch, person_id, guest)
             attendance_count += 1
 
             # Log person information if logging is enabled
             if log_people and person_id:
-                # Get person info with email
-                log_cursor = conn.cursor(cursor_factory=RealDictCursor)
-                try:
-                    log_cursor.execute("""
-                        SELECT
-                            first_name,
-                            last_name,
-                            COALESCE(school_email, personal_email) as email
-                        FROM people
-                        WHERE id = %s
-                    """, (person_id,))
-                    person_info = log_cursor.fetchone()
-                finally:
-                    log_cursor.close()
+                # Get person info with email (from the index; the person may
+                # not be written yet)
+                person_info = people_index['people'].get(person_id)
 
                 # Determine referral code from invite token
                 referral_code = "N/A"
-                if tracking_link and str(tracking_link).lower() not in ['default', 'email', 'txt', 'insta', 'maillist']:
+                if tracking_link and str(tracking_link).lower() not in GENERIC_LOG_CODES:
                     referral_code = str(tracking_link)
 
                 # Attendance status
                 attendance_status = "✓ Attended" if checked_in else "✗ No-show"
 
                 if person_info:
-                    logging.info(f"  📋 {person_info['first_name']} {person_info['last_name']} | {person_info['email'] or 'No email'} | {attendance_status} | Referral: {referral_code}")
+                    email = person_info['school_email'] or person_info['personal_email']
+                    logging.info(f"  📋 {person_info['first_name']} {person_info['last_name']} | {email or 'No email'} | {attendance_status} | Referral: {referral_code}")
 
             # Increment referral count if this person checked in and was referred
             if checked_in:
@@ -1092,33 +1462,27 @@ def process_event_json(event_id, json_path, event_name, log_people=False):
 
                 # Check tracking link for referral
                 if tracking_link:
-                    referrer_id = match_tracking_link_to_person(conn, tracking_link)
+                    referrer_id = match_tracking_link_to_person(people_index, tracking_link)
                     if referrer_id:
                         logging.info(f"  → Tracking link '{tracking_link}' matched to person ID {referrer_id}")
 
-                # Increment referral count
+                # Increment referral count (written when the batch is flushed)
                 if referrer_id and referrer_id != person_id:  # Don't count self-referrals
-                    cursor.execute("""
-                        UPDATE people
-                        SET referral_count = referral_count + 1
-                        WHERE id = %s
-                    """, (referrer_id,))
+                    batch.referrals[referrer_id] += 1
                     logging.info(f"  ✓ Incremented referral_count for person ID {referrer_id}")
 
             processed_count += 1
 
-            # Refresh connection periodically to prevent timeouts
-            if processed_count % CONNECTION_REFRESH_INTERVAL == 0:
-                logging.info(f"\n--- Processed {processed_count} guests, refreshing connection ---")
-                conn = ensure_connection(conn, force_refresh=True)
-                cursor.close()
-                cursor = conn.cursor()
-            elif processed_count % 10 == 0:
-                conn.commit()
+            # Write the staged batch (committed with the rest of the event below)
+            if processed_count % IMPORT_BATCH_SIZE == 0:
+                batch.flush(cursor)
                 logging.info(f"Processed {processed_count}/{len(guests)} guests...")
 
-        # Final commit
-        conn.commit()
+        # Final flush
+        batch.flush(cursor)
+
+        # Update is_first_event flags for everyone who checked in, once
+        update_first_event_flags(conn, event_id)
 
         # Update event attendance count using the new function
         final_attendance_count = update_event_attendance_count(conn, event_id)
@@ -1126,6 +1490,9 @@ def process_event_json(event_id, json_path, event_name, log_people=False):
         # Update person attendance counts for all people who attended this event
         people_updated = update_person_attendance_counts(conn, event_id)
 
+        # The guests, flags and counts commit together as one transaction
+        conn.commit()
+
         # Print enhanced statistics
         logging.info(f"\n=== Import Complete for {event_name} ===")
         logging.info(f"Processed: {processed_count} guests")
@@ -1141,12 +1508,16 @@ def process_event_json(event_id, json_path, event_name, log_people=False):
         raise
     finally:
         cursor.close()
-        conn.close()
+        release_db_connection(conn)
 
-        # Clean up JSON file
+        # Clean up JSON file (and luma_sync.py's download directory once
+        # its last file is gone)
         try:
             os.unlink(json_path)
             logging.info(f"Deleted temporary JSON file: {json_path}")
+            json_dir = os.path.dirname(json_path)
+            if os.path.basename(json_dir).startswith('luma_sync_') and not os.listdir(json_dir):
+                os.rmdir(json_dir)
         except:
             pass
 
@@ -1167,6 +1538,27 @@ def ensure_schema(conn):
         cursor.close()
 
 
+def refresh_event_metrics_view(conn):
+    """
+    Refresh the cached per-event counts read by event_analysis_single.py.
+
+    Skipped when event_metrics_mv has not been created yet
+    (see add_event_metrics_view_migration.py). CONCURRENTLY keeps the view
+    readable while it refreshes.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT to_regclass('event_metrics_mv') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            return
+
+        cursor.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY event_metrics_mv")
+        conn.commit()
+        logging.info("Refreshed event_metrics_mv")
+    finally:
+        cursor.close()
+
+
 def main():
     """Main entry point"""
     # Parse command line arguments
@@ -1184,7 +1576,7 @@ def main():
     try:
         ensure_schema(schema_conn)
     finally:
-        schema_conn.close()
+        release_db_connection(schema_conn)
 
     # Read JSON from stdin (output from luma_sync.py)
     try:
@@ -1208,6 +1600,12 @@ def main():
 
             process_event_json(event_id, json_path, event_name, log_people=args.log_people)
 
+        refresh_conn = get_db_connection()
+        try:
+            refresh_event_metrics_view(refresh_conn)
+        finally:
+            release_db_connection(refresh_conn)
+
         logging.info("All events processed successfully")
 
     except json.JSONDecodeError as e:
@@ -1216,6 +1614,8 @@ def main():
     except Exception as e:
         logging.error(f"Fatal error: {e}")
         sys.exit(1)
+    finally:
+        close_pool()
 
 
 if __name__ == '__main__':
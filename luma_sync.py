@@ -10,11 +10,16 @@ import sys
 import json
 import logging
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
-import psycopg2
+from psycopg2.extras import execute_values
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from db import get_pool, close_pool
 
 # Configure logging
 logging.basicConfig(
@@ -25,31 +30,47 @@ logging.basicConfig(
 # Load environment variables
 load_dotenv()
 
-# Database connection parameters
-DB_CONFIG = {
-    'host': os.getenv('PGHOST'),
-    'port': os.getenv('PGPORT'),
-    'database': os.getenv('PGDATABASE'),
-    'user': os.getenv('PGUSER'),
-    'password': os.getenv('PGPASSWORD')
-}
-
 # Luma API configuration
 LUMA_API_KEY = os.getenv('LUMA_API_KEY')
 LUMA_CALENDAR_ID = os.getenv('LUMA_CALENDAR_ID', '')  # Optional, if needed for API
 LUMA_API_BASE_URL = 'https://public-api.luma.com/v1'
 
+# One keep-alive session for every Luma call (the event list and each guest
+# download), retrying rate limits and transient gateway errors with backoff
+LUMA_SESSION = requests.Session()
+LUMA_SESSION.headers.update({
+    'x-luma-api-key': LUMA_API_KEY,
+    'Content-Type': 'application/json'
+})
+LUMA_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504])
+))
+
+# Concurrent guest-list downloads (within the session's connection pool)
+LUMA_DOWNLOAD_WORKERS = 8
+
+# Luma returns times in UTC
+UTC = ZoneInfo('UTC')
+
 
 def get_db_connection():
-    """Create and return a database connection"""
+    """Borrow a database connection from the shared pool (see db.py)"""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
+        return get_pool().getconn()
     except Exception as e:
         logging.error(f"Failed to connect to database: {e}")
         sys.exit(1)
 
 
+def release_db_connection(conn):
+    """Hand a connection back to the pool, rolling back anything uncommitted"""
+    if not conn.closed:
+        conn.rollback()
+    get_pool().putconn(conn)
+
+
 def get_luma_events():
     """
     Fetch all events from Luma API
@@ -63,11 +84,6 @@ def get_luma_events():
         logging.error("LUMA_CALENDAR_ID not found in environment variables")
         sys.exit(1)
 
-    headers = {
-        'x-luma-api-key': LUMA_API_KEY,
-        'Content-Type': 'application/json'
-    }
-
     try:
         # Luma API endpoint for listing calendar events
         url = f'{LUMA_API_BASE_URL}/calendar/list-events'
@@ -75,7 +91,7 @@ def get_luma_events():
             'calendar_api_id': LUMA_CALENDAR_ID
         }
 
-        response = requests.get(url, headers=headers, params=params, timeout=30)
+        response = LUMA_SESSION.get(url, params=params, timeout=30)
         response.raise_for_status()
 
         data = response.json()
@@ -112,11 +128,6 @@ def download_event_json(event_api_id, save_path):
         save_path: Path to save the JSON file
     Returns: True if successful, False otherwise
     """
-    headers = {
-        'x-luma-api-key': LUMA_API_KEY,
-        'Content-Type': 'application/json'
-    }
-
     try:
         # Luma API guests endpoint
         url = f'{LUMA_API_BASE_URL}/event/get-guests'
@@ -133,7 +144,7 @@ def download_event_json(event_api_id, save_path):
                 params['pagination_cursor'] = next_cursor
 
             # Make API request
-            response = requests.get(url, headers=headers, params=params, timeout=60)
+            response = LUMA_SESSION.get(url, params=params, timeout=60)
             response.raise_for_status()
             data = response.json()
 
@@ -162,9 +173,11 @@ def download_event_json(event_api_id, save_path):
             'total_count': len(all_entries)
         }
 
-        # Save combined JSON response
+        # Save combined JSON response (a temp file for the importer, so it is
+        # written compactly in one call; indent would force the pure-Python
+        # encoder and many small writes)
         with open(save_path, 'w') as f:
-            json.dump(complete_response, f, indent=2)
+            f.write(json.dumps(complete_response))
 
         logging.info(f"Downloaded {len(all_entries)} total guests for event {event_api_id} ({page} page(s))")
         return True
@@ -174,47 +187,74 @@ def download_event_json(event_api_id, save_path):
         return False
 
 
-def event_exists_in_db(cursor, luma_event_id):
+def get_existing_events(cursor, luma_event_ids):
     """
-    Check if an event already exists in the database
+    Look up which Luma events already exist in the database, in one query
+    (served by idx_events_luma_event_id, see add_luma_event_id_index_migration.py)
     Args:
         cursor: Database cursor
-        luma_event_id: Luma event ID to check
-    Returns: Tuple (exists: bool, db_event_id: int or None, attendance: int)
+        luma_event_ids: Luma event IDs to check
+    Returns: Dict of luma_event_id -> (db_event_id, attendance) for the
+        events that exist
     """
     cursor.execute("""
-        SELECT id, attendance
+        SELECT luma_event_id, id, attendance
         FROM events
-        WHERE luma_event_id = %s
-    """, (luma_event_id,))
+        WHERE luma_event_id = ANY(%s)
+    """, (list(luma_event_ids),))
 
-    result = cursor.fetchone()
-    if result:
-        return True, result[0], result[1] or 0
-    return False, None, 0
+    return {luma_event_id: (db_event_id, attendance or 0) for luma_event_id, db_event_id, attendance in cursor.fetchall()}
 
 
-def create_event(cursor, luma_event):
+def extract_event_fields(luma_event, default_name='Untitled Event'):
     """
-    Create a new event in the database from Luma event data
+    Pull the stored event columns out of a Luma event, truncated to fit
     Args:
-        cursor: Database cursor
         luma_event: Luma event dictionary
-    Returns: Database event ID
+            (fields: name, start_at, description, url, api_id, geo_address_json, cover_url, timezone, etc.)
+        default_name: Name to use when the event has none
+    Returns: Tuple of (event_name, description, location, rsvp_link, cover_image_url)
     """
-    # Extract and parse fields from Luma event
-    # Luma API fields: name, start_at, description, url, api_id, geo_address_json, cover_url, timezone, etc.
-    event_name = luma_event.get('name', 'Untitled Event')
-    timezone_str = luma_event.get('timezone')  # Get timezone from Luma
-    start_datetime = parse_luma_datetime(luma_event.get('start_at'), timezone_str)
+    event_name = luma_event.get('name', default_name)[:100]  # Respect VARCHAR(100) limit
     description = luma_event.get('description', '')
     signup_url = luma_event.get('url', '')
     cover_image_url = luma_event.get('cover_url', '')
-    luma_event_id = luma_event.get('api_id')
+
+    # Extract location from geo_address_json
     geo_location = luma_event.get('geo_address_json', {})
     location_str = geo_location.get('city', 'TBD') if isinstance(geo_location, dict) else 'TBD'
+    location_str = location_str[:100]  # Respect VARCHAR(100) limit
 
-    cursor.execute("""
+    return event_name, description, location_str, signup_url, cover_image_url
+
+
+def create_events(cursor, luma_events):
+    """
+    Create new events in the database from Luma event data, in one statement
+    Args:
+        cursor: Database cursor
+        luma_events: List of (Luma event dictionary, start_datetime) tuples,
+            with start_datetime already parsed by parse_luma_datetime
+    Returns: Dict of luma_event_id -> database event ID
+    """
+    if not luma_events:
+        return {}
+
+    rows = []
+    for luma_event, start_datetime in luma_events:
+        event_name, description, location_str, signup_url, cover_image_url = extract_event_fields(luma_event)
+
+        rows.append((
+            event_name,
+            start_datetime,
+            description,
+            signup_url,
+            cover_image_url,
+            luma_event.get('api_id'),
+            location_str
+        ))
+
+    created = execute_values(cursor, """
         INSERT INTO events (
             event_name,
             start_datetime,
@@ -224,111 +264,76 @@ def create_event(cursor, luma_event):
             luma_event_id,
             location,
             attendance
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, 0)
-        RETURNING id
-    """, (
-        event_name[:100],  # Respect VARCHAR(100) limit
-        start_datetime,
-        description,
-        signup_url,
-        cover_image_url,
-        luma_event_id,
-        location_str[:100]  # Respect VARCHAR(100) limit
-    ))
-
-    event_id = cursor.fetchone()[0]
-    logging.info(f"Created new event: {event_name} (DB ID: {event_id}, Luma ID: {luma_event_id})")
-    return event_id
-
-
-def update_event_if_changed(cursor, db_event_id, luma_event):
+        ) VALUES %s
+        RETURNING luma_event_id, id
+    """, rows, template="(%s, %s, %s, %s, %s, %s, %s, 0)", page_size=len(rows), fetch=True)
+
+    event_ids = dict(created)
+    for luma_event, _ in luma_events:
+        luma_event_id = luma_event.get('api_id')
+        logging.info(f"Created new event: {luma_event.get('name', 'Untitled Event')} (DB ID: {event_ids[luma_event_id]}, Luma ID: {luma_event_id})")
+    return event_ids
+
+
+def update_events_if_changed(cursor, events):
     """
     Update event fields that have changed from Luma API
-    Only updates fields that differ from current database values
+    Only updates events whose fields differ from current database values,
+    reading and writing them all in one statement each
     Args:
         cursor: Database cursor
-        db_event_id: Database event ID
-        luma_event: Luma event dictionary
+        events: List of (db_event_id, luma_event, start_datetime) tuples, the
+            start already parsed by parse_luma_datetime
     """
-    # Extract fields from Luma event
-    event_name = luma_event.get('name', '')[:100]  # Respect VARCHAR(100) limit
-    timezone_str = luma_event.get('timezone')
-    start_datetime = parse_luma_datetime(luma_event.get('start_at'), timezone_str)
-    description = luma_event.get('description', '')
-    signup_url = luma_event.get('url', '')
-    cover_image_url = luma_event.get('cover_url', '')
-
-    # Extract location from geo_address_json
-    geo_location = luma_event.get('geo_address_json', {})
-    location_str = geo_location.get('city', 'TBD') if isinstance(geo_location, dict) else 'TBD'
-    location_str = location_str[:100]  # Respect VARCHAR(100) limit
+    if not events:
+        return
 
-    # Fetch current values from database
+    # Fetch current values for every event at once
     cursor.execute("""
-        SELECT event_name, start_datetime, description, location, rsvp_link, speaker_headshot_url
+        SELECT id, event_name, start_datetime, description, location, rsvp_link, speaker_headshot_url
         FROM events
-        WHERE id = %s
-    """, (db_event_id,))
+        WHERE id = ANY(%s)
+    """, ([db_event_id for db_event_id, _, _ in events],))
+    current_values = {row[0]: row[1:] for row in cursor.fetchall()}
 
-    result = cursor.fetchone()
-    if not result:
-        logging.warning(f"Event ID {db_event_id} not found in database")
-        return
+    field_names = ('event_name', 'start_datetime', 'description', 'location', 'rsvp_link', 'speaker_headshot_url')
+    changed_rows = []
+
+    for db_event_id, luma_event, start_datetime in events:
+        current = current_values.get(db_event_id)
+        if current is None:
+            logging.warning(f"Event ID {db_event_id} not found in database")
+            continue
+
+        event_name, description, location_str, signup_url, cover_image_url = extract_event_fields(luma_event, default_name='')
+        new = (event_name, start_datetime, description, location_str, signup_url, cover_image_url)
 
-    current_name, current_start, current_desc, current_location, current_rsvp, current_headshot = result
-
-    # Compare each field and track changes
-    changed_fields = []
-    update_parts = []
-    update_values = []
-
-    # Compare event_name
-    if current_name != event_name:
-        changed_fields.append('event_name')
-        update_parts.append('event_name = %s')
-        update_values.append(event_name)
-
-    # Compare start_datetime (handle potential microsecond differences)
-    if current_start != start_datetime:
-        changed_fields.append('start_datetime')
-        update_parts.append('start_datetime = %s')
-        update_values.append(start_datetime)
-
-    # Compare description
-    if current_desc != description:
-        changed_fields.append('description')
-        update_parts.append('description = %s')
-        update_values.append(description)
-
-    # Compare location
-    if current_location != location_str:
-        changed_fields.append('location')
-        update_parts.append('location = %s')
-        update_values.append(location_str)
-
-    # Compare rsvp_link
-    if current_rsvp != signup_url:
-        changed_fields.append('rsvp_link')
-        update_parts.append('rsvp_link = %s')
-        update_values.append(signup_url)
-
-    # Compare speaker_headshot_url
-    if current_headshot != cover_image_url:
-        changed_fields.append('speaker_headshot_url')
-        update_parts.append('speaker_headshot_url = %s')
-        update_values.append(cover_image_url)
-
-    # Only execute UPDATE if there are actual changes
-    if changed_fields:
-        update_query = f"UPDATE events SET {', '.join(update_parts)} WHERE id = %s"
-        update_values.append(db_event_id)
-
-        cursor.execute(update_query, update_values)
+        # Compare each field and track changes
+        changed_fields = [name for name, old, value in zip(field_names, current, new) if old != value]
+        if not changed_fields:
+            continue
+
+        changed_rows.append((db_event_id,) + new)
 
         field_list = ', '.join(changed_fields)
         field_count = len(changed_fields)
         logging.info(f"Updated event ID {db_event_id}: {field_list} ({field_count} field{'s' if field_count != 1 else ''})")
 
+    # Only execute UPDATE if there are actual changes; unchanged columns of a
+    # changed event are rewritten with their current value
+    if changed_rows:
+        execute_values(cursor, """
+            UPDATE events SET
+                event_name = v.event_name,
+                start_datetime = v.start_datetime,
+                description = v.description,
+                location = v.location,
+                rsvp_link = v.rsvp_link,
+                speaker_headshot_url = v.speaker_headshot_url
+            FROM (VALUES %s) AS v (id, event_name, start_datetime, description, location, rsvp_link, speaker_headshot_url)
+            WHERE events.id = v.id
+        """, changed_rows, template="(%s, %s, %s::timestamp, %s, %s, %s, %s)", page_size=len(changed_rows))
+
 
 def parse_luma_datetime(datetime_str, timezone_str=None):
     """
@@ -347,22 +352,24 @@ def parse_luma_datetime(datetime_str, timezone_str=None):
     try:
         # Parse ISO format datetime
         # Luma returns UTC times with 'Z' suffix
-        if datetime_str.endswith('Z'):
-            datetime_str = datetime_str[:-1]
+        datetime_str = datetime_str.removesuffix('Z')
 
         # Parse as UTC
         dt = datetime.fromisoformat(datetime_str)
 
+        # Already in the target timezone; store the wall time as-is
+        if not timezone_str or timezone_str == 'UTC':
+            return dt.replace(tzinfo=None)
+
         # Add UTC timezone info
-        dt = dt.replace(tzinfo=ZoneInfo('UTC'))
+        dt = dt.replace(tzinfo=UTC)
 
-        # Convert to event's local timezone if provided
-        if timezone_str:
-            try:
-                local_tz = ZoneInfo(timezone_str)
-                dt = dt.astimezone(local_tz)
-            except Exception as e:
-                logging.warning(f"Failed to convert to timezone {timezone_str}: {e}, using UTC")
+        # Convert to event's local timezone
+        try:
+            local_tz = ZoneInfo(timezone_str)
+            dt = dt.astimezone(local_tz)
+        except Exception as e:
+            logging.warning(f"Failed to convert to timezone {timezone_str}: {e}, using UTC")
 
         # Return as naive datetime for PostgreSQL TIMESTAMP column
         # (PostgreSQL will store it as-is without timezone)
@@ -391,6 +398,14 @@ def sync_events():
         now = datetime.now()
         six_hours_ago = now - timedelta(hours=6)
 
+        # Check which events already exist in the database
+        existing_events = get_existing_events(
+            cursor, [luma_event.get('api_id') for luma_event in luma_events if luma_event.get('api_id')]
+        )
+
+        new_events = {}  # luma_event_id -> (Luma event, start), created together below
+        changed_events = []  # (db_event_id, Luma event, start) of existing future events
+        needs_attendance = {}  # luma_event_id -> past event whose attendance hasn't been imported
         events_to_process = []
 
         for luma_event in luma_events:
@@ -406,48 +421,78 @@ def sync_events():
                 logging.warning(f"Skipping event without valid start time: {luma_event.get('name', 'Unknown')}")
                 continue
 
+            # Events that started in the last six hours need no action yet
+            if six_hours_ago <= start_datetime <= now:
+                continue
+
             # Check if event exists in database
-            exists, db_event_id, attendance = event_exists_in_db(cursor, luma_event_id)
+            exists = luma_event_id in existing_events
+            db_event_id, attendance = existing_events.get(luma_event_id, (None, 0))
 
             if start_datetime > now:
                 # Future event - create or update metadata
                 if not exists:
-                    create_event(cursor, luma_event)
+                    new_events.setdefault(luma_event_id, (luma_event, start_datetime))
                 else:
-                    update_event_if_changed(cursor, db_event_id, luma_event)
+                    changed_events.append((db_event_id, luma_event, start_datetime))
 
-            elif start_datetime < six_hours_ago:
+            else:
                 # Past event (>6 hours old)
                 if not exists:
                     # Create the event first
-                    db_event_id = create_event(cursor, luma_event)
-                    attendance = 0
+                    new_events.setdefault(luma_event_id, (luma_event, start_datetime))
 
                 # Check if needs attendance processing
                 if attendance == 0:
-                    # Download JSON to temp file
-                    temp_file = tempfile.NamedTemporaryFile(
-                        mode='w',
-                        suffix='.json',
-                        delete=False,
-                        prefix=f'luma_event_{luma_event_id}_'
-                    )
-                    temp_path = temp_file.name
-                    temp_file.close()
-
-                    if download_event_json(luma_event_id, temp_path):
-                        events_to_process.append({
-                            'event_id': db_event_id,
-                            'json_path': temp_path,
-                            'luma_event_id': luma_event_id,
-                            'event_name': luma_event.get('name', 'Unknown')
-                        })
-                    else:
-                        # Clean up temp file if download failed
-                        os.unlink(temp_path)
-
-        # Commit all database changes
+                    needs_attendance.setdefault(luma_event_id, luma_event)
+
+        # Update changed future events and create all new events at once
+        update_events_if_changed(cursor, changed_events)
+        created_events = create_events(cursor, list(new_events.values()))
+
+        # Commit the event metadata before downloading, so the downloads run
+        # outside a transaction and a failure there doesn't undo the sync
         conn.commit()
+
+        # One directory for this sync's downloads (the importer removes each
+        # file, and the directory once it is empty)
+        download_dir = tempfile.mkdtemp(prefix='luma_sync_') if needs_attendance else None
+
+        downloads = []
+        for luma_event in needs_attendance.values():
+            luma_event_id = luma_event.get('api_id')
+            if luma_event_id in existing_events:
+                db_event_id = existing_events[luma_event_id][0]
+            else:
+                db_event_id = created_events[luma_event_id]
+
+            # Download JSON to temp file
+            temp_path = os.path.join(download_dir, f'luma_event_{luma_event_id}.json')
+            downloads.append((luma_event, db_event_id, temp_path))
+
+        # The downloads are independent and network-bound, so run them concurrently
+        with ThreadPoolExecutor(max_workers=LUMA_DOWNLOAD_WORKERS) as pool:
+            downloaded = list(pool.map(
+                lambda download: download_event_json(download[0].get('api_id'), download[2]),
+                downloads
+            ))
+
+        for (luma_event, db_event_id, temp_path), success in zip(downloads, downloaded):
+            luma_event_id = luma_event.get('api_id')
+            if success:
+                events_to_process.append({
+                    'event_id': db_event_id,
+                    'json_path': temp_path,
+                    'luma_event_id': luma_event_id,
+                    'event_name': luma_event.get('name', 'Unknown')
+                })
+            elif os.path.exists(temp_path):
+                # Clean up temp file if download failed
+                os.unlink(temp_path)
+
+        if download_dir and not events_to_process:
+            os.rmdir(download_dir)
+
         logging.info(f"Sync complete. Found {len(events_to_process)} events needing attendance import.")
 
         return events_to_process
@@ -458,7 +503,7 @@ def sync_events():
         raise
     finally:
         cursor.close()
-        conn.close()
+        release_db_connection(conn)
 
 
 def main():
@@ -478,6 +523,8 @@ def main():
     except Exception as e:
         logging.error(f"Fatal error: {e}")
         sys.exit(2)  # Exit code 2 means error occurred
+    finally:
+        close_pool()
 
 
 if __name__ == '__main__':
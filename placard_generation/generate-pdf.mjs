@@ -4,15 +4,25 @@ import { exec } from "child_process";
 import { promisify } from "util";
 import http from "http";
 import fs from "fs";
+import readline from "readline";
 import { fileURLToPath } from "url";
 import { execSync } from "child_process";
 
 const execAsync = promisify(exec);
 const __dirname = path.dirname(fileURLToPath(import.meta.url));
-const OUTPUT_PATH = path.resolve("event-report.pdf");
-const DIST_DIR = path.resolve("dist");
+// --cwd <dir>: the placard app directory to build and serve (default: the
+// current directory), so callers don't need to change directory first
+const cwdFlag = process.argv.indexOf("--cwd");
+const APP_DIR = path.resolve(cwdFlag !== -1 ? process.argv[cwdFlag + 1] : ".");
+const OUTPUT_PATH = path.join(APP_DIR, "event-report.pdf");
+const DIST_DIR = path.join(APP_DIR, "dist");
 const PORT = 3000;
 
+// --serve: stay alive and render one PDF per JSON job read from stdin
+// (see renderJobs below). stdout carries the replies, so logs go to stderr.
+const SERVE = process.argv.includes("--serve");
+const log = SERVE ? console.error : console.log;
+
 // Find Chromium executable on Railway/Nix systems
 function findChromiumPath() {
   if (process.env.PUPPETEER_EXECUTABLE_PATH) {
@@ -67,22 +77,13 @@ function createServer() {
   });
 }
 
-(async () => {
-  console.log("🔨 Building the React app...");
-  await execAsync("npm run build");
-
-  console.log("🚀 Starting local server...");
-  const server = createServer();
-  await new Promise((resolve) => server.listen(PORT, resolve));
-
-  console.log(`📄 Generating PDF from http://localhost:${PORT}...`);
-
+async function launchBrowser() {
   const chromiumPath = findChromiumPath();
   if (chromiumPath) {
-    console.log(`🔍 Using Chromium at: ${chromiumPath}`);
+    log(`🔍 Using Chromium at: ${chromiumPath}`);
   }
 
-  const browser = await puppeteer.launch({
+  return puppeteer.launch({
     headless: true,
     executablePath: chromiumPath,
     args: [
@@ -92,41 +93,128 @@ function createServer() {
       "--disable-gpu",
     ],
   });
+}
 
+// Render the page at `url` to a single-page PDF and return its bytes (also
+// written to `outputPath` if given). If `eventDataCsv` is given, it is served
+// in place of the built event_data.csv.
+async function renderPdf(browser, url, outputPath, eventDataCsv) {
   const page = await browser.newPage();
-  await page.setViewport({ width: 1440, height: 900, deviceScaleFactor: 2 });
-  await page.goto(`http://localhost:${PORT}`, { waitUntil: "networkidle0" });
-
-  // Wait for fonts and images to load
-  await new Promise((r) => setTimeout(r, 1500));
-
-  // Get the actual content dimensions to create a single-page PDF like the PNG version
-  const contentDimensions = await page.evaluate(() => {
-    return {
-      width: document.documentElement.scrollWidth,
-      height: document.documentElement.scrollHeight,
-    };
-  });
+  try {
+    if (eventDataCsv !== undefined) {
+      await page.setRequestInterception(true);
+      page.on("request", (req) => {
+        if (new URL(req.url()).pathname === "/event_data.csv") {
+          req.respond({ status: 200, contentType: "text/csv", body: eventDataCsv });
+        } else {
+          req.continue();
+        }
+      });
+    }
+
+    await page.setViewport({ width: 1440, height: 900, deviceScaleFactor: 2 });
+    await page.goto(url, { waitUntil: "networkidle0" });
+
+    // Wait for fonts and images to load
+    await new Promise((r) => setTimeout(r, 1500));
+
+    // Get the actual content dimensions to create a single-page PDF like the PNG version
+    const contentDimensions = await page.evaluate(() => {
+      return {
+        width: document.documentElement.scrollWidth,
+        height: document.documentElement.scrollHeight,
+      };
+    });
+
+    log(`📐 Content dimensions: ${contentDimensions.width}x${contentDimensions.height}px`);
+
+    // Convert pixels to inches (96 DPI standard) for PDF
+    const widthInInches = contentDimensions.width / 96;
+    const heightInInches = contentDimensions.height / 96;
+
+    // Generate PDF with custom page size to fit all content on one page
+    return await page.pdf({
+      path: outputPath,
+      width: `${widthInInches}in`,
+      height: `${heightInInches}in`,
+      printBackground: true,
+      margin: {
+        top: 0,
+        right: 0,
+        bottom: 0,
+        left: 0,
+      },
+    });
+  } finally {
+    await page.close();
+  }
+}
 
-  console.log(`📐 Content dimensions: ${contentDimensions.width}x${contentDimensions.height}px`);
-
-  // Convert pixels to inches (96 DPI standard) for PDF
-  const widthInInches = contentDimensions.width / 96;
-  const heightInInches = contentDimensions.height / 96;
-
-  // Generate PDF with custom page size to fit all content on one page
-  await page.pdf({
-    path: OUTPUT_PATH,
-    width: `${widthInInches}in`,
-    height: `${heightInInches}in`,
-    printBackground: true,
-    margin: {
-      top: 0,
-      right: 0,
-      bottom: 0,
-      left: 0,
-    },
+// Encode placard data ({key: value}) as the key-value event_data.csv the app
+// fetches, quoting values the same way Python's csv module does
+function toEventDataCsv(eventData) {
+  const quote = (v) => {
+    const s = String(v ?? "");
+    return /[",\r\n]/.test(s) ? `"${s.replace(/"/g, '""')}"` : s;
+  };
+  const rows = Object.entries(eventData).map(([key, value]) => `${quote(key)},${quote(value)}`);
+  return ["key,value", ...rows].join("\r\n") + "\r\n";
+}
+
+// Write to stdout, waiting for the pipe to drain if it is full
+function writeStdout(chunk) {
+  return new Promise((resolve) => {
+    if (process.stdout.write(chunk)) resolve();
+    else process.stdout.once("drain", resolve);
   });
+}
+
+// Long-lived renderer: the app must already be built (dist/). Each stdin
+// line is a job {"eventData": {key: value}} carrying the placard data, which
+// is served to the page in memory (nothing is read from or written to disk).
+// Each is answered on stdout with a header
+// line, {"ok": true, "size": N} followed by the N bytes of the PDF, or
+// {"ok": false, "error": "..."}.
+async function renderJobs() {
+  const server = createServer();
+  await new Promise((resolve) => server.listen(0, resolve));
+  const url = `http://localhost:${server.address().port}`;
+
+  const browser = await launchBrowser();
+  log(`🚀 Renderer ready on ${url}`);
+
+  const lines = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+  for await (const line of lines) {
+    if (!line.trim()) continue;
+
+    let pdf;
+    try {
+      const job = JSON.parse(line);
+      pdf = await renderPdf(browser, url, undefined, toEventDataCsv(job.eventData));
+    } catch (err) {
+      await writeStdout(JSON.stringify({ ok: false, error: String(err?.stack || err) }) + "\n");
+      continue;
+    }
+    await writeStdout(JSON.stringify({ ok: true, size: pdf.length }) + "\n");
+    await writeStdout(pdf);
+  }
+
+  await browser.close();
+  server.close();
+}
+
+async function renderOnce() {
+  console.log("🔨 Building the React app...");
+  await execAsync("npm run build", { cwd: APP_DIR });
+
+  console.log("🚀 Starting local server...");
+  const server = createServer();
+  await new Promise((resolve) => server.listen(PORT, resolve));
+
+  console.log(`📄 Generating PDF from http://localhost:${PORT}...`);
+
+  const browser = await launchBrowser();
+  await renderPdf(browser, `http://localhost:${PORT}`, OUTPUT_PATH);
 
   console.log(`✅ PDF saved to: ${OUTPUT_PATH}`);
 
@@ -134,4 +222,9 @@ function createServer() {
   server.close();
 
   console.log("🎉 Done!");
-})();
+}
+
+(SERVE ? renderJobs() : renderOnce()).catch((err) => {
+  console.error(err);
+  process.exit(1);
+});
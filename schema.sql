@@ -74,6 +74,9 @@ CREATE TABLE IF NOT EXISTS attendance (
 );
 
 
+CREATE INDEX attendance_event_covering ON public.attendance USING btree (event_id) INCLUDE (person_id, checked_in, is_first_event, rsvp);
+
+
 -- ============================================
 -- TABLE: events
 -- ============================================
@@ -99,6 +102,47 @@ CREATE TABLE IF NOT EXISTS events (
     attendance_data JSONB
 );
 
+CREATE INDEX idx_events_luma_event_id ON public.events USING btree (luma_event_id) WHERE (luma_event_id IS NOT NULL);
+
+
+-- ============================================
+-- MATERIALIZED VIEW: event_metrics_mv
+-- ============================================
+-- Cached per-event attendance/demographic counts for event_analysis_single.py
+-- (created by add_event_metrics_view_migration.py, refreshed after each import)
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS event_metrics_mv AS
+WITH event_cutoffs AS (
+    SELECT
+        id,
+        CASE
+            WHEN EXTRACT(MONTH FROM start_datetime) >= 8
+                THEN EXTRACT(YEAR FROM start_datetime)::int + 2
+            ELSE EXTRACT(YEAR FROM start_datetime)::int + 1
+        END AS cutoff_year
+    FROM events
+)
+SELECT
+    e.id AS event_id,
+    COUNT(*) FILTER (WHERE a.rsvp) AS rsvps,
+    COUNT(*) FILTER (WHERE a.checked_in) AS attendees,
+    COUNT(*) FILTER (WHERE a.checked_in AND a.is_first_event) AS first_timers,
+    COUNT(*) FILTER (WHERE a.checked_in AND p.gender = 'M') AS male,
+    COUNT(*) FILTER (WHERE a.checked_in AND p.gender = 'F') AS female,
+    COUNT(*) FILTER (WHERE a.checked_in AND p.school = 'mit') AS mit,
+    COUNT(*) FILTER (WHERE a.checked_in AND p.school = 'harvard') AS harvard,
+    COUNT(*) FILTER (WHERE a.checked_in AND p.class_year > e.cutoff_year) AS underclassmen,
+    COUNT(*) FILTER (WHERE a.checked_in AND p.class_year <= e.cutoff_year) AS upperclassmen,
+    COUNT(*) FILTER (WHERE a.checked_in AND p.event_attendance_count = 1) AS first_event,
+    COUNT(*) FILTER (WHERE a.checked_in AND p.event_attendance_count BETWEEN 2 AND 3) AS events_2_3,
+    COUNT(*) FILTER (WHERE a.checked_in AND p.event_attendance_count >= 4) AS events_4_plus
+FROM event_cutoffs e
+LEFT JOIN attendance a ON a.event_id = e.id
+LEFT JOIN people p ON p.id = a.person_id
+GROUP BY e.id;
+
+CREATE UNIQUE INDEX event_metrics_mv_event_id ON public.event_metrics_mv USING btree (event_id);
+
 
 -- ============================================
 -- TABLE: event_feedback
@@ -281,6 +325,8 @@ CREATE TABLE IF NOT EXISTS people (
     CHECK ((school IS NULL) OR ((school)::text = ANY ((ARRAY['harvard'::character varying, 'mit'::character varying, 'other'::character varying])::text[])))
 );
 
+CREATE INDEX people_id_demo ON public.people USING btree (id) INCLUDE (gender, school, class_year, event_attendance_count);
+
 
 -- ============================================
 -- TABLE: promos
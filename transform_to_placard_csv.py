@@ -8,55 +8,128 @@ it into the key-value CSV format expected by the placard generation system.
 
 import argparse
 import csv
+import re
 import sys
 from datetime import datetime
-import pandas as pd
+from functools import lru_cache
+
+# Non-ISO dates such as '2/11/26', '2/11/2026' or '2/5'
+SLASH_DATE_RE = re.compile(r'^(\d{1,2})/(\d{1,2})(?:/(\d{2}|\d{4}))?$')
+
+# Retention columns read and placard keys written for events i-1 through i-4:
+# (i, name column, date column, return rate column, first-timer return rate
+# column, label key, total key, new key)
+RETENTION_KEYS = tuple(
+    (
+        i,
+        f"event_name_i_minus_{i}",
+        f"event_date_i_minus_{i}",
+        f"return_rate_i_minus_{i}",
+        f"first_timer_return_rate_i_minus_{i}",
+        f"retention_event_{i}",
+        f"retention_total_{i}",
+        f"retention_new_{i}",
+    )
+    for i in range(1, 5)
+)
+
+
+def is_missing(val):
+    """Return True for an empty CSV cell, None, or a NaN float."""
+    return val is None or val == "" or (isinstance(val, float) and val != val)
+
+
+def parse_date(date_str):
+    """
+    Parse an ISO datetime string (as written by event_analysis_single.py) or
+    an M/D[/YY] date.
+
+    Args:
+        date_str: Date string or datetime
+
+    Returns:
+        datetime
+
+    Raises:
+        ValueError: If the string is in neither format
+    """
+    if isinstance(date_str, datetime):
+        return date_str
+
+    try:
+        return datetime.fromisoformat(date_str)
+    except ValueError:
+        match = SLASH_DATE_RE.match(date_str.strip())
+        if not match:
+            raise
+
+    month, day, year = match.groups()
+    if year is None:
+        year = datetime.now().year
+    elif len(year) == 2:
+        year = 2000 + int(year)
+    return datetime(int(year), int(month), int(day))
 
 
 def format_date_short(date_str):
     """
-    Convert ISO datetime to short format (e.g., '2/11/26' or '2/5').
+    Convert ISO datetime to short format with year (e.g., '2/11/26').
 
     Args:
-        date_str: ISO datetime string or None
+        date_str: ISO datetime string, datetime, or None
 
     Returns:
         Formatted short date string or empty string
     """
-    if not date_str or pd.isna(date_str):
+    if is_missing(date_str):
         return ""
 
     try:
-        # Parse the datetime string
-        dt = pd.to_datetime(date_str)
-        # Format as M/D/YY or M/D depending on context
-        # For event date, include year
-        if '/' in date_str or '-' in date_str:
-            return dt.strftime("%-m/%-d/%y")
-        return dt.strftime("%-m/%-d")
+        # Parse the datetime string and format as M/D/YY
+        dt = parse_date(date_str)
+        return f"{dt.month}/{dt.day}/{dt.year % 100:02d}"
     except Exception as e:
         print(f"Warning: Could not parse date '{date_str}': {e}", file=sys.stderr)
         return str(date_str)
 
 
+@lru_cache(maxsize=1024)
 def format_previous_event_date(date_str):
-    """Format previous event date to short format without year (e.g., '2/5')."""
-    if not date_str or pd.isna(date_str):
+    """
+    Format previous event date to short format without year (e.g., '2/5').
+
+    Cached, since the same earlier events' dates recur across the retention
+    columns and across events in generate_all_placards.py.
+    """
+    if is_missing(date_str):
         return ""
 
     try:
-        dt = pd.to_datetime(date_str)
-        return dt.strftime("%-m/%-d")
+        dt = parse_date(date_str)
+        return f"{dt.month}/{dt.day}"
     except Exception:
         return str(date_str)
 
 
+def fmt_pct(val):
+    """Format a count or percentage as a whole number string ("0" if missing or unparseable)."""
+    if is_missing(val):
+        return "0"
+    if type(val) is int:  # not bool, which would format as "True"
+        return str(val)
+    try:
+        # Round to whole number for display
+        return str(int(round(float(val))))
+    except (ValueError, TypeError):
+        return "0"
+
+
 def transform_event_to_placard_format(event_row):
     """
     Transform a single event row to placard key-value format.
 
     Args:
-        event_row: pandas Series containing event analysis data
+        event_row: Mapping (e.g. a csv.DictReader row) containing event analysis data
 
     Returns:
         Dictionary mapping placard keys to values
@@ -64,18 +137,13 @@ def transform_event_to_placard_format(event_row):
     # Helper function to safely get values
     def get_val(key, default=""):
         val = event_row.get(key, default)
-        return "" if pd.isna(val) else val
-
-    # Helper to format percentages (remove decimal if whole number)
-    def fmt_pct(val):
-        if pd.isna(val) or val == "":
-            return "0"
-        try:
-            num = float(val)
-            # Round to whole number for display
-            return str(int(round(num)))
-        except (ValueError, TypeError):
-            return "0"
+        return "" if is_missing(val) else val
+
+    # Financials are only shown if cost data exists
+    cost = get_val("cost")
+    per_attendee_cost = get_val("per_attendee_cost")
+    per_first_timer_cost = get_val("per_first_timer_cost")
+    has_cost = cost != ""
 
     # Build the placard data dictionary
     placard_data = {
@@ -99,10 +167,10 @@ def transform_event_to_placard_format(event_row):
         "firstTimersDelta": fmt_pct(get_val("first_timers_pct_change")),
 
         # Financials (conditional - only if cost data exists)
-        "hasCostData": "true" if (not pd.isna(get_val("cost")) and get_val("cost") != "") else "false",
-        "totalCost": fmt_pct(get_val("cost")) if (not pd.isna(get_val("cost")) and get_val("cost") != "") else "N/A",
-        "perAttendee": f"{float(get_val('per_attendee_cost')):.2f}" if (not pd.isna(get_val("per_attendee_cost")) and get_val("per_attendee_cost") != "") else "N/A",
-        "perFirstTimer": f"{float(get_val('per_first_timer_cost')):.2f}" if (not pd.isna(get_val("per_first_timer_cost")) and get_val("per_first_timer_cost") != "") else "N/A",
+        "hasCostData": "true" if has_cost else "false",
+        "totalCost": fmt_pct(cost) if has_cost else "N/A",
+        "perAttendee": f"{float(per_attendee_cost):.2f}" if per_attendee_cost != "" else "N/A",
+        "perFirstTimer": f"{float(per_first_timer_cost):.2f}" if per_first_timer_cost != "" else "N/A",
 
         # Demographics - Gender
         "malePct": fmt_pct(get_val("male_pct")),
@@ -124,10 +192,10 @@ def transform_event_to_placard_format(event_row):
 
     # Retention metrics (i-1 through i-4)
     # Format: "EventName, Date" for event, then total and new percentages
-    for i in range(1, 5):
+    for i, name_col, date_col, rate_col, new_rate_col, event_key, total_key, new_key in RETENTION_KEYS:
         # Get event name and date from the CSV (now included from enhanced analysis script)
-        event_name = get_val(f"event_name_i_minus_{i}")
-        event_date = format_previous_event_date(get_val(f"event_date_i_minus_{i}"))
+        event_name = get_val(name_col)
+        event_date = format_previous_event_date(get_val(date_col))
 
         # Fallback to previous_event fields for i=1 if the new columns don't exist
         if (not event_name or event_name == "") and i == 1:
@@ -136,10 +204,69 @@ def transform_event_to_placard_format(event_row):
 
         retention_label = f"{event_name}, {event_date}" if event_date else event_name
 
-        placard_data[f"retention_event_{i}"] = retention_label
-        placard_data[f"retention_total_{i}"] = fmt_pct(get_val(f"return_rate_i_minus_{i}"))
-        placard_data[f"retention_new_{i}"] = fmt_pct(get_val(f"first_timer_return_rate_i_minus_{i}"))
+        placard_data[event_key] = retention_label
+        placard_data[total_key] = fmt_pct(get_val(rate_col))
+        placard_data[new_key] = fmt_pct(get_val(new_rate_col))
+
+    return placard_data
+
+
+def write_placard_csv(placard_data, output_csv):
+    """Write placard data to output_csv in key-value format."""
+    with open(output_csv, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['key', 'value'])
+        writer.writerows(placard_data.items())
+
+
+def find_event_row(input_csv, event_id):
+    """
+    Stream the analysis CSV and return the row for one event.
+
+    Stops at the first match, so only the rows up to it are parsed.
+
+    Args:
+        input_csv: Path to the analysis CSV
+        event_id: Event ID to look up
+
+    Returns:
+        The event's row as a dict of column -> string, or None if not found
+    """
+    with open(input_csv, newline='', buffering=1 << 20) as f:
+        for row in csv.DictReader(f):
+            if int(row['event_id']) == event_id:
+                return row
+    return None
+
+
+def transform(event_id, input_csv, output_csv=None):
+    """
+    Transform one event's analysis row into placard data.
+
+    To transform a row already in hand, call
+    transform_event_to_placard_format directly.
+
+    Args:
+        event_id: Event ID to transform
+        input_csv: Path to the analysis CSV
+        output_csv: Optional path to also write the placard key-value CSV to
+
+    Returns:
+        Dictionary of placard data
+
+    Raises:
+        ValueError: If the event is not in the input data
+    """
+    event_row = find_event_row(input_csv, event_id)
+
+    if event_row is None:
+        raise ValueError(f"Event ID {event_id} not found in input data")
+
+    # Transform to placard format
+    placard_data = transform_event_to_placard_format(event_row)
 
+    if output_csv:
+        write_placard_csv(placard_data, output_csv)
     return placard_data
 
 
@@ -166,9 +293,9 @@ def main():
 
     args = parser.parse_args()
 
-    # Read the input CSV
+    # Find the event's row in the input CSV
     try:
-        df = pd.read_csv(args.input_csv)
+        event_row = find_event_row(args.input_csv, args.event_id)
     except FileNotFoundError:
         print(f"Error: Input file not found: {args.input_csv}", file=sys.stderr)
         sys.exit(1)
@@ -176,32 +303,18 @@ def main():
         print(f"Error reading CSV: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Find the row for the specified event_id
-    event_rows = df[df['event_id'] == args.event_id]
-
-    if event_rows.empty:
+    if event_row is None:
         print(f"Error: Event ID {args.event_id} not found in {args.input_csv}", file=sys.stderr)
         sys.exit(1)
 
-    # Get the first matching row (should only be one)
-    event_row = event_rows.iloc[0]
-
-    # Transform to placard format
-    placard_data = transform_event_to_placard_format(event_row)
-
-    # Write to output CSV in key-value format
     try:
-        with open(args.output_csv, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['key', 'value'])
-            for key, value in placard_data.items():
-                writer.writerow([key, value])
-
-        print(f"Successfully wrote placard data for event {args.event_id} to {args.output_csv}")
+        write_placard_csv(transform_event_to_placard_format(event_row), args.output_csv)
     except Exception as e:
         print(f"Error writing output CSV: {e}", file=sys.stderr)
         sys.exit(1)
 
+    print(f"Successfully wrote placard data for event {args.event_id} to {args.output_csv}")
+
 
 if __name__ == "__main__":
     main()